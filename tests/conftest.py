@@ -33,6 +33,18 @@ assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts'])
     'Пожалуйста зарегистрируйте приложение в `settings.INSTALLED_APPS`'
 )
 
+import pytest
+
+from core.testing import temp_cache
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_cache():
+    # Свой кеш во временном каталоге, как у manage.py test.
+    with temp_cache():
+        yield
+
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
@@ -1,5 +1,26 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.core.cache import caches
+from django.db.models.signals import post_migrate
+
+
+def clear_caches(sender, **kwargs):
+    """После migrate закешированные страницы и версии ключей устаревают.
+
+    post_migrate приходит по разу на каждое приложение с моделями, у core
+    моделей нет; кеш чистится один раз, на последнем приложении.
+    """
+    configs = [
+        config for config in apps.get_app_configs()
+        if config.models_module is not None
+    ]
+    if configs and sender is not configs[-1]:
+        return
+    for cache in caches.all():
+        cache.clear()
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        post_migrate.connect(clear_caches, dispatch_uid='core.clear_caches')
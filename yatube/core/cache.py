@@ -0,0 +1,293 @@
+"""Кеш в файле SQLite, общий для всех процессов одной машины."""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+# Время последнего чтения обновляется не чаще, чем раз в столько секунд,
+# чтобы чтения не превращались в запись на каждый запрос.
+ACCESS_RESOLUTION: float = 10.0
+# Через столько обращений счётчики процесса сбрасываются в общую таблицу.
+STATS_FLUSH_EVERY: int = 100
+DEFAULT_MAX_SIZE: int = 256 * 1024 * 1024
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL,'
+    ' size INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+    'CREATE TABLE IF NOT EXISTS cache_stats ('
+    ' name TEXT PRIMARY KEY,'
+    ' value INTEGER NOT NULL)',
+    # Число и объём записей ведут триггеры в той же транзакции, что и саму
+    # запись: проверка пределов не пересчитывает всю таблицу.
+    'CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN'
+    " UPDATE cache_stats SET value = value + 1 WHERE name = 'entries';"
+    " UPDATE cache_stats SET value = value + NEW.size WHERE name = 'size';"
+    ' END',
+    'CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN'
+    " UPDATE cache_stats SET value = value - 1 WHERE name = 'entries';"
+    " UPDATE cache_stats SET value = value - OLD.size WHERE name = 'size';"
+    ' END',
+    'CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache'
+    ' BEGIN'
+    ' UPDATE cache_stats SET value = value + NEW.size - OLD.size'
+    " WHERE name = 'size';"
+    ' END',
+    # Файл, созданный до триггеров, пересчитывается один раз.
+    "INSERT OR IGNORE INTO cache_stats SELECT 'entries', COUNT(*) FROM cache",
+    "INSERT OR IGNORE INTO cache_stats SELECT 'size', TOTAL(size) FROM cache",
+)
+
+
+class SQLiteCache(BaseCache):
+    """Кеш Django в файле SQLite с вытеснением давно не читанных ключей.
+
+    ``LOCATION`` - путь к файлу. Кроме ``MAX_ENTRIES`` понимает
+    ``OPTIONS['MAX_SIZE']`` - предел суммарного размера значений в байтах.
+    Попадания и промахи считаются в процессе и периодически складываются
+    в таблицу ``cache_stats``, общую для всех процессов.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = os.path.abspath(location)
+        options = params.get('OPTIONS', {})
+        self._max_size = int(options.get('MAX_SIZE', DEFAULT_MAX_SIZE))
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._pending = {'hits': 0, 'misses': 0}
+
+    @property
+    def _db(self):
+        """Соединение своё у каждого потока и у каждого процесса после fork."""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            db = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _count(self, hits=0, misses=0):
+        with self._stats_lock:
+            self._pending['hits'] += hits
+            self._pending['misses'] += misses
+            if sum(self._pending.values()) < STATS_FLUSH_EVERY:
+                return
+            pending, self._pending = self._pending, {'hits': 0, 'misses': 0}
+        self._flush_stats(pending)
+
+    def _flush_stats(self, pending):
+        self._db.executemany(
+            'INSERT INTO cache_stats (name, value) VALUES (?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+            pending.items(),
+        )
+
+    def _read(self, keys):
+        """Живые значения по ключам; отмечает чтение для вытеснения."""
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._db.execute(
+            f'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({placeholders})',
+            keys,
+        ).fetchall()
+        found = {}
+        stale = []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[key] = pickle.loads(value)
+            if now - accessed > ACCESS_RESOLUTION:
+                stale.append(key)
+        if stale:
+            placeholders = ', '.join('?' * len(stale))
+            self._db.execute(
+                f'UPDATE cache SET accessed = ? WHERE key IN ({placeholders})',
+                [now, *stale],
+            )
+        self._count(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def _write(self, items, timeout, only_new=False):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = []
+        for key, value in items:
+            data = pickle.dumps(value, self.pickle_protocol)
+            rows.append((key, data, expires, now, len(data)))
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if only_new:
+                db.execute(
+                    'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                    (rows[0][0], now),
+                )
+                written = db.execute(
+                    'INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?, ?)',
+                    rows[0],
+                ).rowcount
+            else:
+                # REPLACE удаляет старую строку без триггера DELETE,
+                # поэтому замена идёт через UPDATE.
+                written = db.executemany(
+                    'INSERT INTO cache VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET value = excluded.value,'
+                    ' expires = excluded.expires,'
+                    ' accessed = excluded.accessed, size = excluded.size',
+                    rows,
+                ).rowcount
+            self._cull(db, now)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return written
+
+    @staticmethod
+    def _totals(db):
+        """Число записей и их суммарный размер из ``cache_stats``."""
+        totals = dict(db.execute(
+            'SELECT name, value FROM cache_stats '
+            "WHERE name IN ('entries', 'size')"
+        ))
+        return totals.get('entries', 0), totals.get('size', 0)
+
+    def _cull(self, db, now):
+        """Удаляет просроченные, затем давно не читанные ключи."""
+        entries, size = self._totals(db)
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        entries, size = self._totals(db)
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        if self._cull_frequency == 0:
+            db.execute('DELETE FROM cache')
+            return
+        # Как и встроенные бэкенды, при переполнении по числу ключей
+        # освобождаем место с запасом: 1 / CULL_FREQUENCY всех ключей.
+        excess = 0
+        if entries > self._max_entries:
+            excess = max(
+                entries - self._max_entries,
+                entries // self._cull_frequency,
+            )
+        victims = 0
+        freed = 0
+        rows = db.execute('SELECT size FROM cache ORDER BY accessed')
+        for row_size, in rows:
+            if victims >= excess and size - freed <= self._max_size:
+                break
+            victims += 1
+            freed += row_size
+        db.execute(
+            'DELETE FROM cache WHERE key IN ('
+            ' SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (victims,),
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        return bool(self._write([(key, value)], timeout, only_new=True))
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._read([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        names = {self._key(key, version): key for key in keys}
+        found = self._read(list(names))
+        return {names[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write([(self._key(key, version), value)], timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if data:
+            self._write(
+                [(self._key(key, version), value)
+                 for key, value in data.items()],
+                timeout,
+            )
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        updated = self._db.execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), now, key, now),
+        ).rowcount
+        return bool(updated)
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+
+    def delete_many(self, keys, version=None):
+        names = [self._key(key, version) for key in keys]
+        if names:
+            placeholders = ', '.join('?' * len(names))
+            self._db.execute(
+                f'DELETE FROM cache WHERE key IN ({placeholders})', names
+            )
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт весь поток: открывать SQLite на каждый запрос
+        # дороже, чем держать его.
+        pass
+
+    def stats(self):
+        """Попадания и промахи всех процессов, число и объём записей."""
+        with self._stats_lock:
+            pending, self._pending = self._pending, {'hits': 0, 'misses': 0}
+        self._flush_stats(pending)
+        stats = dict(self._db.execute('SELECT name, value FROM cache_stats'))
+        hits = stats.get('hits', 0)
+        misses = stats.get('misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': stats.get('entries', 0),
+            'size': int(stats.get('size', 0)),
+        }
@@ -0,0 +1,22 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания, промахи и заполненность кеша.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('alias', nargs='?', default='default')
+
+    def handle(self, *args, **options):
+        cache = caches[options['alias']]
+        if not hasattr(cache, 'stats'):
+            raise CommandError(
+                f'Кеш {options["alias"]} не собирает статистику.'
+            )
+        stats = cache.stats()
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}, промахов: {stats["misses"]}, '
+            f'доля попаданий: {stats["hit_rate"]:.1%}\n'
+            f'Записей: {stats["entries"]}, объём: {stats["size"]} байт'
+        )
@@ -0,0 +1,185 @@
+"""Раздача статики и медиа прямо из WSGI, до Django.
+
+Файл под STATIC_URL или MEDIA_URL отдаётся без middleware и URLconf.
+Файлы с хешем в имени (статика после collectstatic, картинки постов,
+миниатюры sorl) не меняются и кешируются браузером на год; остальные
+браузер переспрашивает по ETag. Поддерживаются запросы диапазонов и
+сжатые копии .br/.gz. Тело отдаётся через ``wsgi.file_wrapper``, который
+у gunicorn и uWSGI пишет файл в сокет через sendfile без копирования.
+Чего нет на диске, уходит дальше в Django.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.handlers.wsgi import get_path_info
+from django.utils.http import (
+    http_date, parse_etags, parse_http_date_safe, quote_etag
+)
+
+
+BLOCK_SIZE: int = 64 * 1024
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+# Хеш в имени: bootstrap.min.3f9a2c1e8b7d.css, posts/3f/<sha256>.jpg.
+HASHED = re.compile(r'(^|\.)[0-9a-f]{12,}\.')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def get_mounts():
+    mounts = []
+    for url, root in (
+        (settings.STATIC_URL, getattr(settings, 'STATIC_ROOT', None)),
+        (settings.MEDIA_URL, settings.MEDIA_ROOT),
+    ):
+        if url and root and url.startswith('/'):
+            mounts.append((url, os.path.abspath(root)))
+    return mounts
+
+
+def _stat(path):
+    try:
+        info = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return info if stat.S_ISREG(info.st_mode) else None
+
+
+def parse_range(header, size):
+    """(начало, конец) включительно, None - весь файл, False - мимо."""
+    match = RANGE.match(header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end or int(end) == 0:
+            return False
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read(file, length):
+    with file:
+        while length > 0:
+            block = file.read(min(BLOCK_SIZE, length))
+            if not block:
+                return
+            length -= len(block)
+            yield block
+
+
+class StaticFilesApp:
+    """WSGI-обёртка, которая раздаёт файлы STATIC_ROOT и MEDIA_ROOT."""
+
+    def __init__(self, application, mounts=None):
+        self.application = application
+        self.mounts = get_mounts() if mounts is None else mounts
+
+    def __call__(self, environ, start_response):
+        if environ['REQUEST_METHOD'] in ('GET', 'HEAD'):
+            path = self.find(get_path_info(environ))
+            if path is not None:
+                return self.serve(path, environ, start_response)
+        return self.application(environ, start_response)
+
+    def find(self, url_path):
+        for prefix, root in self.mounts:
+            if not url_path.startswith(prefix):
+                continue
+            path = os.path.normpath(
+                os.path.join(root, url_path[len(prefix):])
+            )
+            if path.startswith(root + os.sep) and _stat(path):
+                return path
+        return None
+
+    def pick_encoding(self, path, environ):
+        accepted = environ.get('HTTP_ACCEPT_ENCODING', '')
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and _stat(path + suffix):
+                return encoding, path + suffix
+        return None, path
+
+    def serve(self, path, environ, start_response):
+        info = _stat(path)
+        byte_range = None
+        if 'HTTP_RANGE' in environ and self.range_applies(
+            environ, self.make_etag(info), info.st_mtime
+        ):
+            byte_range = parse_range(environ['HTTP_RANGE'], info.st_size)
+        # Диапазоны считаются по несжатому файлу.
+        encoding, body_path = None, path
+        if byte_range is None:
+            encoding, body_path = self.pick_encoding(path, environ)
+        body = _stat(body_path)
+        etag = self.make_etag(body, encoding)
+        content_type = mimetypes.guess_type(path)[0]
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Last-Modified', http_date(info.st_mtime)),
+            ('ETag', etag),
+            ('Accept-Ranges', 'bytes'),
+            ('Cache-Control', IMMUTABLE if HASHED.search(
+                os.path.basename(path)
+            ) else REVALIDATE),
+        ]
+        if any(_stat(path + suffix) for _, suffix in ENCODINGS):
+            headers.append(('Vary', 'Accept-Encoding'))
+        if self.not_modified(environ, etag, info.st_mtime):
+            start_response('304 Not Modified', headers)
+            return []
+        if byte_range is False:
+            headers.append(('Content-Range', f'bytes */{info.st_size}'))
+            start_response('416 Range Not Satisfiable', headers)
+            return []
+        status = '200 OK'
+        start, length = 0, body.st_size
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            status = '206 Partial Content'
+            headers.append(
+                ('Content-Range', f'bytes {start}-{end}/{info.st_size}')
+            )
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        headers.append(('Content-Length', str(length)))
+        start_response(status, headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(body_path, 'rb')
+        file.seek(start)
+        wrapper = environ.get('wsgi.file_wrapper')
+        if wrapper is not None and start + length == body.st_size:
+            # Сервер сам допишет файл до конца с текущей позиции.
+            return wrapper(file, BLOCK_SIZE)
+        return _read(file, length)
+
+    def make_etag(self, info, encoding=None):
+        tag = f'{info.st_mtime_ns:x}-{info.st_size:x}'
+        return quote_etag(f'{tag}-{encoding}' if encoding else tag)
+
+    def not_modified(self, environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            tags = parse_etags(if_none_match)
+            return '*' in tags or etag in tags
+        since = parse_http_date_safe(
+            environ.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return since is not None and int(mtime) <= since
+
+    def range_applies(self, environ, etag, mtime):
+        if_range = environ.get('HTTP_IF_RANGE')
+        if if_range is None:
+            return True
+        if if_range.startswith(('"', 'W/')):
+            return if_range == etag
+        return parse_http_date_safe(if_range) == int(mtime)
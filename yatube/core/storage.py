@@ -0,0 +1,63 @@
+"""Статика с хешем в имени и заранее сжатыми копиями.
+
+collectstatic кладёт в STATIC_ROOT файлы вида
+``bootstrap.min.3f9a2c1e8b7d.css`` и рядом ``.gz`` и ``.br`` (если
+установлен пакет brotli); core.static отдаёт их с вечным кешем. Пока
+collectstatic не запускался, манифеста нет, и ссылки остаются без
+хеша - так работают разработка и тесты.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.html', '.json', '.map', '.xml',
+)
+# Сжатая копия, которая экономит меньше, не нужна.
+MIN_RATIO: float = 0.95
+
+
+def compress(path):
+    """Пишет рядом с файлом .gz и .br; возвращает созданные пути."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    created = []
+    for suffix, packed in variants:
+        if len(packed) >= len(data) * MIN_RATIO:
+            continue
+        with open(path + suffix, 'wb') as target:
+            target.write(packed)
+        created.append(path + suffix)
+    return created
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed = []
+        for name, hashed_name, done in super().post_process(
+            paths, dry_run, **options
+        ):
+            processed.append(hashed_name)
+            yield name, hashed_name, done
+        if dry_run:
+            return
+        for name in (*paths, *processed):
+            if isinstance(name, str) and name.endswith(COMPRESSIBLE):
+                path = self.path(name)
+                if os.path.exists(path):
+                    compress(path)
@@ -0,0 +1,41 @@
+"""Тесты со своим кешем во временном каталоге.
+
+Страницы из кеша разработки не попадают в ответы тестов, а
+``cache.clear()`` в тестах не стирает кеш разработки.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def temp_cache():
+    """Кеш ``default`` в новом временном файле на время блока."""
+    directory = tempfile.mkdtemp(prefix='yatube-cache-')
+    default = {
+        **settings.CACHES['default'],
+        'LOCATION': os.path.join(directory, 'cache.sqlite3'),
+    }
+    try:
+        with override_settings(CACHES={**settings.CACHES, 'default': default}):
+            yield
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    """``manage.py test`` с временным кешем, см. ``temp_cache``."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cleanup = ExitStack()
+        self._cleanup.enter_context(temp_cache())
+
+    def teardown_test_environment(self, **kwargs):
+        self._cleanup.close()
+        super().teardown_test_environment(**kwargs)
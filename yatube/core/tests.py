@@ -0,0 +1,275 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+from wsgiref.util import FileWrapper, setup_testing_defaults
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.cache import SQLiteCache
+from core.static import IMMUTABLE, REVALIDATE, StaticFilesApp
+from core.warmup import warm_templates
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_set_get_delete(self):
+        """Значение записывается, читается и удаляется"""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertTrue(self.cache.has_key('key'))
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_shared_between_instances(self):
+        """Запись одного процесса видна другому"""
+        self.cache.set('key', 'value')
+        self.assertEqual(self.make_cache().get('key'), 'value')
+
+    def test_expired_value_is_missing(self):
+        """Просроченное значение не возвращается"""
+        self.cache.set('key', 'value', timeout=10)
+        with mock.patch('core.cache.time.time', return_value=time.time() + 20):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'new'))
+        self.assertFalse(self.cache.add('key', 'newer'))
+
+    def test_get_many(self):
+        """get_many читает несколько ключей за раз"""
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2}
+        )
+
+    def test_least_recently_used_are_evicted(self):
+        """При переполнении вытесняются давно не читанные ключи"""
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        now = time.time()
+        for i, key in enumerate('abc'):
+            with mock.patch('core.cache.time.time', return_value=now + i):
+                cache.set(key, key)
+        with mock.patch('core.cache.time.time', return_value=now + 100):
+            cache.get('a')
+            cache.set('d', 'd')
+        self.assertEqual(
+            cache.get_many(['a', 'b', 'c', 'd']),
+            {'a': 'a', 'c': 'c', 'd': 'd'}
+        )
+
+    def test_size_limit(self):
+        """Суммарный размер значений не превышает MAX_SIZE"""
+        cache = self.make_cache(MAX_SIZE=3000)
+        for i in range(10):
+            cache.set(f'key{i}', 'x' * 1000)
+        self.assertLessEqual(cache.stats()['size'], 3000)
+        self.assertIsNotNone(cache.get('key9'))
+
+    def test_stats(self):
+        """Попадания и промахи считаются"""
+        self.cache.set('key', 'value')
+        self.cache.get('key')
+        self.cache.get('missing')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['entries'], 1)
+
+    def assertTotalsMatch(self, cache):
+        db = sqlite3.connect(self.path)
+        try:
+            entries, size = db.execute(
+                'SELECT COUNT(*), TOTAL(size) FROM cache'
+            ).fetchone()
+        finally:
+            db.close()
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['size']), (entries, size))
+
+    def test_totals_follow_writes(self):
+        """Число и объём записей ведутся без пересчёта таблицы"""
+        cache = self.make_cache(MAX_ENTRIES=5)
+        cache.set('key', 'x')
+        cache.set('key', 'x' * 100)
+        cache.set_many({f'key{i}': 'x' * i for i in range(10)})
+        self.assertTotalsMatch(cache)
+        cache.add('new', 'value')
+        cache.add('new', 'other value')
+        cache.delete('new')
+        cache.delete_many(['key1', 'key2'])
+        self.assertTotalsMatch(cache)
+        cache.clear()
+        self.assertTotalsMatch(cache)
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_totals_counted_for_old_file(self):
+        """Файл без счётчиков пересчитывается при подключении"""
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.cache._db.execute(
+            "DELETE FROM cache_stats WHERE name IN ('entries', 'size')"
+        )
+        self.assertTotalsMatch(self.make_cache())
+
+
+class CacheSettingsTest(TestCase):
+    def test_tests_use_own_cache(self):
+        """Тесты пишут не в кеш разработки"""
+        self.assertNotEqual(
+            settings.CACHES['default']['LOCATION'],
+            os.path.join(settings.BASE_DIR, 'cache', 'cache.sqlite3'),
+        )
+
+    def test_migrate_clears_cache(self):
+        """После migrate кеш пуст, очистка одна на весь migrate"""
+        cache.set('page', 'stale')
+        with mock.patch.object(
+            SQLiteCache, 'clear', autospec=True,
+            side_effect=SQLiteCache.clear,
+        ) as clear:
+            call_command('migrate', verbosity=0)
+        self.assertIsNone(cache.get('page'))
+        self.assertEqual(clear.call_count, 1)
+
+
+class StaticFilesAppTest(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.dir, 'static')
+        os.makedirs(self.root)
+        self.write('app.0123456789ab.css', b'body{}' * 100)
+        self.write('app.0123456789ab.css.gz', gzip.compress(b'body{}' * 100))
+        self.write('plain.txt', b'0123456789')
+        self.write(os.path.join('..', 'secret.txt'), b'secret')
+        self.django = mock.Mock(return_value=[b'django'])
+        self.app = StaticFilesApp(self.django, [('/static/', self.root)])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, name, data):
+        with open(os.path.join(self.root, name), 'wb') as file:
+            file.write(data)
+
+    def get(self, path, **headers):
+        environ = {'PATH_INFO': path, **headers}
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = int(status.split()[0])
+            response['headers'] = dict(headers)
+        body = self.app(environ, start_response)
+        response['body'] = b''.join(body)
+        return response
+
+    def test_cache_headers(self):
+        """Файл с хешем кешируется навсегда, остальные переспрашиваются"""
+        hashed = self.get('/static/app.0123456789ab.css')
+        plain = self.get('/static/plain.txt')
+        self.assertEqual(hashed['headers']['Cache-Control'], IMMUTABLE)
+        self.assertEqual(hashed['headers']['Content-Type'], 'text/css')
+        self.assertEqual(plain['headers']['Cache-Control'], REVALIDATE)
+        self.assertEqual(plain['body'], b'0123456789')
+        not_modified = self.get(
+            '/static/plain.txt', HTTP_IF_NONE_MATCH=plain['headers']['ETag']
+        )
+        self.assertEqual(not_modified['status'], 304)
+        self.assertEqual(not_modified['body'], b'')
+
+    def test_precompressed_variant(self):
+        """Браузеру с gzip отдаётся заранее сжатая копия"""
+        response = self.get(
+            '/static/app.0123456789ab.css', HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(response['headers']['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response['body']), b'body{}' * 100)
+
+    def test_ranges(self):
+        """Запросы диапазонов получают 206 или 416"""
+        cases = (
+            ('bytes=2-4', 206, b'234', 'bytes 2-4/10'),
+            ('bytes=-3', 206, b'789', 'bytes 7-9/10'),
+            ('bytes=8-', 206, b'89', 'bytes 8-9/10'),
+            ('bytes=20-', 416, b'', 'bytes */10'),
+        )
+        for header, status, body, content_range in cases:
+            with self.subTest(header=header):
+                response = self.get('/static/plain.txt', HTTP_RANGE=header)
+                self.assertEqual(response['status'], status)
+                self.assertEqual(response['body'], body)
+                self.assertEqual(
+                    response['headers']['Content-Range'], content_range
+                )
+
+    def test_file_wrapper(self):
+        """Целый файл отдаётся через wsgi.file_wrapper сервера"""
+        wrapper = mock.Mock(side_effect=FileWrapper)
+        self.get('/static/plain.txt', **{'wsgi.file_wrapper': wrapper})
+        wrapper.assert_called_once()
+
+    def test_other_paths_go_to_django(self):
+        """Чужие пути, выход из каталога и пропавшие файлы - в Django"""
+        for path in (
+            '/about/', '/static/../secret.txt', '/static/missing.css',
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)['body'], b'django')
+
+
+class CompressedManifestStorageTest(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_collectstatic(self):
+        """collectstatic добавляет хеш в имя и сжатые копии"""
+        self.assertEqual(
+            static('css/bootstrap.min.css'), '/static/css/bootstrap.min.css'
+        )
+        with override_settings(STATIC_ROOT=self.root):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            url = static('css/bootstrap.min.css')
+        self.assertRegex(
+            url, r'^/static/css/bootstrap\.min\.[0-9a-f]{12}\.css$'
+        )
+        path = os.path.join(self.root, url[len('/static/'):])
+        self.assertTrue(os.path.exists(path + '.gz'))
+
+
+DEBUG_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'OPTIONS': {**settings.TEMPLATES[0]['OPTIONS'], 'debug': True},
+}]
+
+
+class WarmTemplatesTest(SimpleTestCase):
+    def test_warms_cached_loader(self):
+        """С кеширующим загрузчиком разбираются все шаблоны"""
+        self.assertGreater(warm_templates(), 0)
+
+    @override_settings(TEMPLATES=DEBUG_TEMPLATES)
+    def test_skipped_without_cached_loader(self):
+        """Без кеширующего загрузчика шаблоны заранее не разбираются"""
+        with mock.patch(
+            'django.template.engine.Engine.get_template'
+        ) as get_template:
+            self.assertEqual(warm_templates(), 0)
+        get_template.assert_not_called()
@@ -0,0 +1,64 @@
+"""Разбор всех шаблонов при старте процесса.
+
+С кеширующим загрузчиком шаблон читается с диска и разбирается один раз
+на процесс, при первом обращении. ``warm_templates`` делает это заранее
+для всех шаблонов из каталогов загрузчиков, чтобы первые запросы
+воркера не платили за разбор base.html и его включений. Без кеширующего
+загрузчика (при DEBUG) разобранное не сохраняется, и прогрев пропускается.
+"""
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = ('.html', '.txt')
+
+
+def get_template_dirs(loaders):
+    for loader in loaders:
+        if hasattr(loader, 'loaders'):
+            yield from get_template_dirs(loader.loaders)
+        elif hasattr(loader, 'get_dirs'):
+            yield from loader.get_dirs()
+
+
+def get_template_names(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(EXTENSIONS):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def warm_templates():
+    """Загружает все шаблоны, возвращает число разобранных."""
+    total = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        if not any(
+            isinstance(loader, CachedLoader)
+            for loader in engine.template_loaders
+        ):
+            continue
+        names = dict.fromkeys(
+            name
+            for directory in get_template_dirs(engine.template_loaders)
+            for name in get_template_names(str(directory))
+        )
+        for name in names:
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                # Например, шаблоны приложений, которых нет в
+                # INSTALLED_APPS: их теги не загружены.
+                logger.debug('Шаблон %s не разобран', name, exc_info=True)
+                continue
+            total += 1
+    return total
@@ -1,13 +1,83 @@
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models.expressions import RawSQL
+from django.http import StreamingHttpResponse
+from .groups import get_group_by_id
 from .models import Post, Group
+from .paginator import EstimatedCountPaginator
+from . import export, search
+
+
+class GroupAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение группы; выбранная группа берётся из posts.groups.
+
+    Обычный виджет делает запрос за выбранным значением на каждой
+    строке списка постов.
+    """
+
+    def optgroups(self, name, value, attr=None):
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        for pk in value:
+            group = get_group_by_id(pk)
+            if group is not None:
+                options.append(self.create_option(
+                    name, group.pk, str(group), True, len(options)
+                ))
+        return [(None, options, 0)]
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group', )
     list_editable = ('group', )
+    list_select_related = ('author', 'group', )
+    autocomplete_fields = ('author', 'group', )
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('export_jsonl', 'export_csv', )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = GroupAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту идёт по индексу posts.search, а не LIKE.
+        match = search.to_match(search_term)
+        if not match:
+            return queryset, False
+        found = RawSQL(
+            f'SELECT rowid FROM {search.TABLE} '
+            f'WHERE {search.TABLE} MATCH %s',
+            [match],
+        )
+        return queryset.filter(pk__in=found), False
+
+    def export(self, queryset, fmt, content_type):
+        lines = export.serialize(
+            'posts', export.get_rows('posts', queryset), fmt
+        )
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="posts.{fmt}"'
+        )
+        return response
+
+    def export_jsonl(self, request, queryset):
+        return self.export(queryset, 'jsonl', 'application/x-ndjson')
+    export_jsonl.short_description = 'Выгрузить выбранные посты в JSONL'
+
+    def export_csv(self, request, queryset):
+        return self.export(queryset, 'csv', 'text/csv; charset=utf-8')
+    export_csv.short_description = 'Выгрузить выбранные посты в CSV'
 
 
 admin.site.register(Post, PostAdmin)
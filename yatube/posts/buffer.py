@@ -0,0 +1,143 @@
+"""Отложенная запись комментариев пачками.
+
+При ``POSTS_COMMENT_BUFFER = True`` представление не пишет комментарий
+само, а ставит его в очередь процесса. Фоновый поток раз в ``INTERVAL``
+секунд сохраняет очередь короткими транзакциями по ``BATCH_SIZE``
+комментариев: всплеск запросов превращается в несколько записей вместо
+очереди одиночных INSERT за блокировкой SQLite. Пачка, которую не удалось
+записать, возвращается в начало очереди и повторяется на следующем такте.
+Комментарий появляется на странице с задержкой до интервала; очередь,
+не сохранённая до падения процесса, теряется.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+from .caching import bump, post_key
+from .counters import change_comments_counter
+from .models import Comment, Post, User
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE: int = 500
+INTERVAL: float = 0.5
+# Повторы пачки при «database is locked», пауза удваивается.
+RETRIES: int = 5
+BACKOFF: float = 0.05
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def is_enabled():
+    return getattr(settings, 'POSTS_COMMENT_BUFFER', False)
+
+
+class CommentBuffer:
+    """Очередь комментариев процесса и поток, который её сохраняет."""
+
+    def __init__(self, batch_size=BATCH_SIZE, interval=INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = deque()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, post_id, author_id, text):
+        self._queue.append((post_id, author_id, text))
+
+    def __len__(self):
+        return len(self._queue)
+
+    def flush(self):
+        """Сохраняет всю очередь, возвращает число записанных комментариев."""
+        saved = 0
+        with self._flush_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                try:
+                    saved += self._save(batch)
+                except Exception:
+                    self._queue.extendleft(reversed(batch))
+                    logger.exception(
+                        'Не удалось сохранить комментарии: %d', len(batch)
+                    )
+                    break
+        return saved
+
+    def _save(self, batch):
+        for attempt in range(RETRIES):
+            try:
+                return self._write(batch)
+            except OperationalError as error:
+                if 'locked' not in str(error) or attempt == RETRIES - 1:
+                    raise
+                time.sleep(BACKOFF * 2 ** attempt)
+
+    @transaction.atomic
+    def _write(self, batch):
+        # Пост или автор могли быть удалены, пока комментарий ждал.
+        post_ids = set(Post.objects.filter(
+            pk__in={post_id for post_id, _, _ in batch}
+        ).values_list('pk', flat=True))
+        author_ids = set(User.objects.filter(
+            pk__in={author_id for _, author_id, _ in batch}
+        ).values_list('pk', flat=True))
+        comments = [
+            Comment(post_id=post_id, author_id=author_id, text=text)
+            for post_id, author_id, text in batch
+            if post_id in post_ids and author_id in author_ids
+        ]
+        Comment.objects.bulk_create(comments)
+        counts = Counter(comment.post_id for comment in comments)
+        for post_id, count in counts.items():
+            change_comments_counter(post_id, count)
+        keys = [post_key(post_id) for post_id in counts]
+        if keys:
+            transaction.on_commit(lambda: bump(*keys))
+        return len(comments)
+
+    def start(self):
+        """Запускает фоновый поток и сохранение очереди при выходе."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name='comment-buffer', daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Сбой записи очереди комментариев')
+            finally:
+                # У потока своё соединение; SQLite открывает его быстро.
+                connection.close()
+
+
+def get_comment_buffer():
+    """Очередь процесса; поток запускается при первом обращении."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = CommentBuffer()
+            _buffer.start()
+    return _buffer
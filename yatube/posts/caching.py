@@ -0,0 +1,169 @@
+"""Версии закешированных страниц, которые меняют сигналы моделей.
+
+Ключ страницы включает версии данных, из которых она собрана. Сигнал
+меняет версию, и все страницы со старой версией в ключе больше не
+читаются, а вытесняются кешем по мере надобности.
+"""
+import hashlib
+from functools import wraps
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
+
+
+PAGE_TIMEOUT: int = 60 * 60
+CARD_TIMEOUT: int = 24 * 60 * 60
+# Версия живёт дольше страниц, собранных с ней; потерянная версия
+# только заставляет собрать страницы заново.
+VERSION_TIMEOUT: int = 7 * 24 * 60 * 60
+VERSION_PREFIX: str = 'posts:version:'
+MODIFIED_PREFIX: str = 'posts:modified:'
+CARD_PREFIX: str = 'posts:card:'
+
+INDEX = 'index'
+# Общая версия для страниц, где у постов есть ссылки на группы.
+GROUPS = 'groups'
+# Версия самих групп, см. posts.groups.
+GROUP_LIST = 'group_list'
+
+
+def group_key(slug):
+    return f'group:{slug}'
+
+
+def author_key(username):
+    return f'author:{username}'
+
+
+def post_key(post_id):
+    return f'post:{post_id}'
+
+
+def read_versions(*names):
+    """Текущие версии за одно чтение кеша, не создавая недостающих.
+
+    Возвращает версии и словарь недостающих ключей с новыми значениями;
+    их сохраняет ``save_versions``. Потерянная версия заводится заново
+    случайной строкой, а не нулём, чтобы не ожили страницы,
+    закешированные до вытеснения.
+    """
+    keys = [VERSION_PREFIX + name for name in names]
+    found = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in found}
+    return [found.get(key, missing.get(key)) for key in keys], missing
+
+
+def save_versions(missing):
+    """Сохраняет новые версии; если другой процесс успел раньше - его."""
+    for key, version in missing.items():
+        cache.add(key, version, timeout=VERSION_TIMEOUT)
+
+
+def get_versions(*names):
+    versions, missing = read_versions(*names)
+    if not missing:
+        return versions
+    save_versions(missing)
+    return [
+        cache.get(VERSION_PREFIX + name, version)
+        for name, version in zip(names, versions)
+    ]
+
+
+def bump(*names):
+    cache.set_many(
+        {VERSION_PREFIX + name: uuid4().hex for name in names},
+        timeout=VERSION_TIMEOUT,
+    )
+
+
+def cache_versioned(get_names, timeout=PAGE_TIMEOUT):
+    """Как cache_page, но ключ страницы зависит от версий её данных.
+
+    ``get_names`` получает аргументы представления и возвращает имена
+    версий страницы.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            versions = get_versions(*get_names(*args, **kwargs))
+            prefix = 'posts:' + '.'.join(versions)
+            cached_view = cache_page(timeout, key_prefix=prefix)(view)
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_anonymous(get_names, get_last_modified, timeout=PAGE_TIMEOUT):
+    """Кеш страницы и ответы 304 для анонимных посетителей.
+
+    ETag - отпечаток версий данных страницы, Last-Modified даёт
+    ``get_last_modified`` с аргументами представления и запоминается в
+    кеше под тем же отпечатком. Браузер обязан переспрашивать страницу,
+    поэтому сброс версии виден сразу, а неизменная страница отдаётся
+    ответом 304 без шаблона и запросов к базе. Ответ 304 дают только по
+    ETag: удаление поста или перенос в другую группу не сдвигают время
+    изменения, и If-Modified-Since без ETag вернул бы старую страницу;
+    Last-Modified только для сведения. Новые версии сохраняются,
+    только если страница нашлась: адреса несуществующих групп и авторов
+    не оставляют в кеше ключей. Авторизованным страница собирается как
+    обычно: в ней есть их кнопки подписки.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            versions, missing = read_versions(*get_names(*args, **kwargs))
+            tag = hashlib.md5('.'.join(versions).encode()).hexdigest()
+            modified_key = MODIFIED_PREFIX + tag
+            # Значение в кортеже: у пустой ленты времени изменения нет.
+            memo = None if missing else cache.get(modified_key)
+            if memo is None:
+                last_modified = get_last_modified(*args, **kwargs)
+            else:
+                last_modified, = memo
+            cached_view = condition(
+                etag_func=lambda *args, **kwargs: tag,
+            )(cache_page(timeout, key_prefix='posts:' + tag)(view))
+            response = cached_view(request, *args, **kwargs)
+            if response.status_code == 200:
+                save_versions(missing)
+                if memo is None:
+                    cache.set(modified_key, (last_modified,), timeout)
+            if response.status_code in (200, 304) and last_modified:
+                response['Last-Modified'] = http_date(
+                    last_modified.timestamp()
+                )
+            if response.has_header('Expires'):
+                del response['Expires']
+            patch_cache_control(response, max_age=0, must_revalidate=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def card_key(post, hide_group=False):
+    """Ключ карточки поста в ленте.
+
+    Версия карточки - отпечаток всего, что в ней выводится: текст,
+    дата, картинка, имя автора и адрес группы. Правка поста, смена имени
+    автора или адреса группы дают новый ключ без отдельного сброса, а
+    старые карточки вытесняются кешем.
+    """
+    group_slug = post.group.slug if post.group_id else ''
+    stamp = '\0'.join((
+        post.text,
+        post.pub_date.isoformat(),
+        post.image.name or '',
+        post.author.username,
+        post.author.get_full_name(),
+        group_slug,
+        '-' if hide_group else '+',
+    ))
+    digest = hashlib.md5(stamp.encode()).hexdigest()
+    return f'{CARD_PREFIX}{post.pk}:{digest}'
@@ -0,0 +1,107 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import AuthorStats, Follow, Post, User
+
+
+# Поле счётчика: модель, строки которой считаем, и её ссылка на автора.
+AUTHOR_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def get_stats(user):
+    """Счётчики пользователя; для новичка без строки возвращает нули."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(user=user)
+
+
+def change_author_counter(user_id, field, delta):
+    stats = AuthorStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        # Строки, вставленные через bulk_create, не были учтены.
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    updated = stats.update(**{field: F(field) + delta})
+    if updated or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            AuthorStats.objects.create(user_id=user_id, **{field: delta})
+    except IntegrityError:
+        change_author_counter(user_id, field, delta)
+
+
+def change_comments_counter(post_id, delta):
+    Post.objects.filter(
+        pk=post_id, comments_count__gte=max(-delta, 0)
+    ).update(
+        comments_count=F('comments_count') + delta, updated=timezone.now()
+    )
+
+
+def count_author_rows(user_ids=None):
+    """Настоящие значения счётчиков авторов, посчитанные агрегатами."""
+    actual = {}
+    for field, (model, author_field) in AUTHOR_COUNTERS.items():
+        rows = model.objects.all()
+        if user_ids is not None:
+            rows = rows.filter(**{f'{author_field}__in': user_ids})
+        totals = rows.values(author_field).annotate(total=Count('pk'))
+        for row in totals.order_by():
+            actual.setdefault(row[author_field], {})[field] = row['total']
+    return actual
+
+
+def rebuild_author_counters(user_ids=None, commit=True):
+    """Сверяет счётчики авторов с данными, возвращает число расхождений."""
+    actual = count_author_rows(user_ids)
+    users = User.objects.select_related('stats').order_by('pk')
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    to_create = []
+    to_update = []
+    for user in users.iterator():
+        stats = get_stats(user)
+        values = actual.get(user.pk, {})
+        changed = False
+        for field in AUTHOR_COUNTERS:
+            value = values.get(field, 0)
+            if getattr(stats, field) != value:
+                setattr(stats, field, value)
+                changed = True
+        if not changed:
+            continue
+        if stats.pk is None:
+            to_create.append(stats)
+        else:
+            to_update.append(stats)
+    if commit:
+        with transaction.atomic():
+            AuthorStats.objects.bulk_create(to_create)
+            AuthorStats.objects.bulk_update(
+                to_update, list(AUTHOR_COUNTERS)
+            )
+    return len(to_create) + len(to_update)
+
+
+def rebuild_comments_counters(post_ids=None, commit=True):
+    """Сверяет счётчики комментариев, возвращает число расхождений."""
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    stale = list(
+        posts.order_by()
+        .annotate(actual=Count('comments'))
+        .exclude(comments_count=F('actual'))
+        .only('pk', 'comments_count')
+    )
+    for post in stale:
+        post.comments_count = post.actual
+    if commit:
+        Post.objects.bulk_update(stale, ['comments_count'])
+    return len(stale)
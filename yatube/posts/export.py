@@ -0,0 +1,106 @@
+"""Потоковая выгрузка постов, комментариев и подписок в JSONL и CSV.
+
+Строки читаются пачками по возрастанию id (``id > последний``), поэтому
+память не растёт с размером таблицы и долгий курсор не держит базу.
+Поля постов совпадают с форматом ``import_posts``.
+"""
+import csv
+import json
+
+from .models import Comment, Follow, Post
+
+
+CHUNK_SIZE: int = 2000
+FORMATS = ('jsonl', 'csv')
+
+# Выгружаемая модель: выборка, поля в файле -> поля values(), поле даты.
+EXPORTS = {
+    'posts': (
+        Post.objects.all(),
+        {
+            'id': 'pk',
+            'text': 'text',
+            'author': 'author__username',
+            'group': 'group__slug',
+            'pub_date': 'pub_date',
+            'image': 'image',
+        },
+        'pub_date',
+    ),
+    'comments': (
+        Comment.objects.all(),
+        {
+            'id': 'pk',
+            'post': 'post_id',
+            'author': 'author__username',
+            'text': 'text',
+            'created': 'created',
+        },
+        'created',
+    ),
+    'follows': (
+        Follow.objects.all(),
+        {
+            'id': 'pk',
+            'user': 'user__username',
+            'author': 'author__username',
+        },
+        None,
+    ),
+}
+
+
+def get_rows(name, queryset=None, since_id=None, since=None,
+             chunk_size=CHUNK_SIZE):
+    """Словари строк выгрузки по возрастанию id.
+
+    ``since_id`` и ``since`` - отметки прошлой выгрузки: берутся строки
+    с большим id и не старше даты. У подписок даты нет.
+    """
+    default, fields, date_field = EXPORTS[name]
+    rows = default if queryset is None else queryset
+    if since_id is not None:
+        rows = rows.filter(pk__gt=since_id)
+    if since is not None:
+        if date_field is None:
+            raise ValueError(f'У выгрузки {name} нет даты')
+        rows = rows.filter(**{f'{date_field}__gte': since})
+    rows = rows.order_by('pk').values_list(*fields.values())
+    names = list(fields)
+    last = None
+    while True:
+        chunk = rows if last is None else rows.filter(pk__gt=last)
+        chunk = list(chunk[:chunk_size])
+        for values in chunk:
+            yield dict(zip(names, values))
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1][0]
+
+
+def to_text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class _Line:
+    """Файл для csv.writer, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def serialize(name, rows, fmt):
+    """Строки файла выгрузки одна за другой."""
+    if fmt == 'jsonl':
+        for row in rows:
+            line = json.dumps(row, ensure_ascii=False, default=to_text)
+            yield line + '\n'
+        return
+    writer = csv.writer(_Line())
+    yield writer.writerow(EXPORTS[name][1])
+    for row in rows:
+        yield writer.writerow([to_text(value) for value in row.values()])
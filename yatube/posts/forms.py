@@ -1,11 +1,44 @@
 from django import forms
+from django.forms.models import ModelChoiceIterator
+from .groups import get_group_by_id, get_groups
+from .images import get_max_upload
 from .models import Post, Comment
 
 
+class GroupChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for group in get_groups():
+            yield self.choice(group)
+
+    def __len__(self):
+        return len(get_groups()) + (self.field.empty_label is not None)
+
+
+class GroupChoiceField(forms.ModelChoiceField):
+    """Выбор группы из групп в памяти процесса, без запросов к базе."""
+
+    iterator = GroupChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        group = get_group_by_id(value)
+        if group is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice'
+            )
+        return group
+
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ['text', 'group', 'image', ]
+        field_classes = {
+            'group': GroupChoiceField,
+        }
         labels = {
             'text': 'Текст',
             'group': 'Выберите группу',
@@ -15,6 +48,16 @@ class PostForm(forms.ModelForm):
             'group': ('Выбор группы')
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        limit = get_max_upload()
+        if image and getattr(image, 'size', 0) > limit:
+            raise forms.ValidationError(
+                f'Картинка больше {limit // (1024 * 1024)} МБ',
+                code='too_large',
+            )
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
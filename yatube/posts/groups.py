@@ -0,0 +1,55 @@
+"""Группы в памяти процесса.
+
+Групп мало, и меняются они редко, поэтому процесс держит в памяти их
+все и перечитывает из базы, только когда сигнал модели сменит версию
+``GROUP_LIST`` в общем кеше. В установившемся режиме поиск группы и
+список для формы стоят одно чтение кеша и ни одного запроса к базе.
+Группы общие для всех запросов процесса: менять их на месте нельзя.
+"""
+from django.http import Http404
+
+from .caching import GROUP_LIST, get_versions
+from .models import Group
+
+
+# Версия, группы по порядку, группы по адресу и по id.
+_cached = (None, (), {}, {})
+
+
+def _get_cached():
+    global _cached
+    # Версия читается раньше групп: если группы поменяют между этими
+    # чтениями, следующая проверка увидит новую версию и перечитает их.
+    version, = get_versions(GROUP_LIST)
+    if _cached[0] != version:
+        groups = tuple(Group.objects.order_by('pk'))
+        _cached = (
+            version,
+            groups,
+            {group.slug: group for group in groups},
+            {group.pk: group for group in groups},
+        )
+    return _cached
+
+
+def get_groups():
+    return _get_cached()[1]
+
+
+def get_group(slug):
+    return _get_cached()[2].get(slug)
+
+
+def get_group_by_id(pk):
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    return _get_cached()[3].get(pk)
+
+
+def get_group_or_404(slug):
+    group = get_group(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
@@ -0,0 +1,186 @@
+"""Подготовка картинок постов к хранению.
+
+Новая картинка поста уменьшается до ``MAX_SIDE`` по большей стороне,
+поворачивается по EXIF и пересохраняется без метаданных, а её размеры
+записываются в пост. JPEG декодируется сразу в уменьшенном масштабе,
+поэтому фото с камеры не разворачивается в память целиком. Копии в
+других форматах (``POSTS_IMAGE_SIBLINGS``) режет пул миниатюр рядом с
+файлом: ``posts/cat.jpg.webp``.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import toint
+from sorl.thumbnail.parsers import parse_geometry
+
+from .models import Post
+
+
+logger = logging.getLogger(__name__)
+
+MAX_SIDE: int = 1920
+MAX_UPLOAD: int = 20 * 1024 * 1024
+QUALITY: int = 85
+SIBLINGS = ()
+
+# Форматы, в которых картинка остаётся, и их расширения.
+EXTENSIONS = {
+    'JPEG': ('.jpg', '.jpeg'),
+    'PNG': ('.png',),
+    'GIF': ('.gif',),
+    'WEBP': ('.webp',),
+}
+TRANSPARENT_MODES = ('RGBA', 'LA', 'PA')
+SIBLING_FORMATS = ('webp', 'avif')
+
+
+def get_max_side():
+    return getattr(settings, 'POSTS_IMAGE_MAX_SIDE', MAX_SIDE)
+
+
+def get_max_upload():
+    return getattr(settings, 'POSTS_IMAGE_MAX_UPLOAD', MAX_UPLOAD)
+
+
+def get_siblings():
+    return getattr(settings, 'POSTS_IMAGE_SIBLINGS', SIBLINGS)
+
+
+def _target_format(image, source_format):
+    if source_format in EXTENSIONS:
+        return source_format
+    if image.mode in TRANSPARENT_MODES or 'transparency' in image.info:
+        return 'PNG'
+    return 'JPEG'
+
+
+def _encode(image, fmt, icc_profile=None):
+    options = {}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if fmt == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options.update(quality=QUALITY, optimize=True, progressive=True)
+    elif fmt == 'WEBP':
+        options.update(quality=QUALITY, method=4)
+    elif fmt == 'PNG':
+        options.update(optimize=True)
+    output = BytesIO()
+    image.save(output, fmt, **options)
+    return output.getvalue()
+
+
+def _rename(name, fmt):
+    root, ext = os.path.splitext(os.path.basename(name))
+    if ext.lower() in EXTENSIONS[fmt]:
+        return root + ext
+    return root + EXTENSIONS[fmt][0]
+
+
+def normalize(file):
+    """Картинка для хранения и её размеры: (файл, ширина, высота).
+
+    Анимацию пересобрать нельзя без потери кадров, поэтому у неё
+    только читаются размеры.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        if getattr(image, 'is_animated', False):
+            file.seek(0)
+            return file, image.width, image.height
+        source_format = image.format
+        icc_profile = image.info.get('icc_profile')
+        max_side = get_max_side()
+        # thumbnail сам включает уменьшенное декодирование JPEG.
+        image.thumbnail((max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        fmt = _target_format(image, source_format)
+        data = _encode(image, fmt, icc_profile)
+        width, height = image.size
+    return ContentFile(data, name=_rename(file.name, fmt)), width, height
+
+
+def prepare(post):
+    """Нормализует новую картинку поста и обновляет размеры в нём."""
+    if not post.image:
+        post.image_width = post.image_height = None
+        return
+    if post.image._committed:
+        return
+    file, width, height = normalize(post.image.file)
+    if file is not post.image.file:
+        post.image = file
+    post.image_width, post.image_height = width, height
+
+
+def get_storage():
+    """Хранилище картинок постов, см. posts.storage."""
+    return Post._meta.get_field('image').storage
+
+
+def sibling_name(name, fmt):
+    return f'{name}.{fmt.lower()}'
+
+
+def is_sibling(name):
+    root, ext = os.path.splitext(name.lower())
+    return ext.lstrip('.') in SIBLING_FORMATS and any(
+        root.endswith(extensions) for extensions in EXTENSIONS.values()
+    )
+
+
+def delete_siblings(storage, name):
+    for fmt in SIBLING_FORMATS:
+        storage.delete(sibling_name(name, fmt))
+
+
+def can_save(fmt):
+    Image.init()
+    return fmt.upper() in Image.SAVE
+
+
+def make_siblings(name):
+    """Сохраняет копии картинки в форматах POSTS_IMAGE_SIBLINGS."""
+    storage = get_storage()
+    formats = [
+        fmt for fmt in get_siblings()
+        if not storage.exists(sibling_name(name, fmt))
+    ]
+    if not formats:
+        return
+    with storage.open(name) as file, Image.open(file) as image:
+        if getattr(image, 'is_animated', False):
+            return
+        image.load()
+        for fmt in formats:
+            if not can_save(fmt):
+                logger.warning('Pillow не умеет сохранять %s', fmt)
+                continue
+            data = _encode(image, fmt.upper())
+            storage.save_as(sibling_name(name, fmt), ContentFile(data))
+
+
+def thumbnail_size(width, height, geometry, crop=None, upscale=None):
+    """Размеры миниатюры sorl по размерам картинки, без открытия файла.
+
+    Повторяет расчёт масштаба и обрезки движка sorl для картинки без
+    EXIF-поворота - такой её оставляет ``prepare``.
+    """
+    if not width or not height:
+        return None
+    if upscale is None:
+        upscale = thumbnail_settings.THUMBNAIL_UPSCALE
+    x, y = parse_geometry(geometry, width / height)
+    factors = (x / width, y / height)
+    factor = max(factors) if crop else min(factors)
+    if factor < 1 or upscale:
+        width, height = toint(width * factor), toint(height * factor)
+    if crop and crop != 'noop':
+        width, height = min(width, x), min(height, y)
+    return width, height
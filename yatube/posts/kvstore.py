@@ -0,0 +1,74 @@
+import threading
+from contextlib import contextmanager
+
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDBKVStore
+)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class KVStore(CachedDBKVStore):
+    """Хранилище метаданных миниатюр sorl с пакетным чтением.
+
+    Данные лежат в общей для всех процессов таблице ``thumbnail_kvstore``,
+    перед ней стоит кеш ``THUMBNAIL_CACHE``. Внутри ``prefetched``
+    миниатюры целой страницы берутся из словаря, прочитанного одним
+    обращением к кешу и не более чем одним запросом к базе; остальные
+    чтения идут как в sorl - через кеш в базу.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+
+    @property
+    def _prefetched(self):
+        return getattr(self._local, 'values', None)
+
+    def get_many_raw(self, image_files):
+        """Сырые значения {ключ хранилища: значение} для списка файлов."""
+        keys = list(dict.fromkeys(
+            add_prefix(image_file.key) for image_file in image_files
+        ))
+        values = self.cache.get_many(keys)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            found = dict(
+                KVStoreModel.objects.filter(key__in=missing).values_list(
+                    'key', 'value'
+                )
+            )
+            fetched = {key: found.get(key, EMPTY_VALUE) for key in missing}
+            self.cache.set_many(fetched, settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(fetched)
+        return values
+
+    @contextmanager
+    def prefetched(self, image_files):
+        """На время блока файлы читаются из одного пакетного чтения."""
+        previous = self._prefetched
+        self._local.values = self.get_many_raw(image_files)
+        try:
+            yield
+        finally:
+            self._local.values = previous
+
+    def _get_raw(self, key):
+        values = self._prefetched
+        if values is None or key not in values:
+            return super()._get_raw(key)
+        value = values[key]
+        return None if value == EMPTY_VALUE else value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        if self._prefetched is not None:
+            self._prefetched[key] = value
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        if self._prefetched is not None:
+            for key in keys:
+                self._prefetched.pop(key, None)
@@ -0,0 +1,74 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts.export import EXPORTS, FORMATS, get_rows, serialize
+
+
+def parse_since(value):
+    date = parse_datetime(value)
+    if date is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Неверная дата: {value!r}')
+        date = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+class Command(BaseCommand):
+    help = (
+        'Построчно выгружает посты, комментарии или подписки в JSONL '
+        'или CSV. Для ночных выгрузок - только новое с отметки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=list(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--output', '-o', help='Файл выгрузки; по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--since-id',
+            type=int,
+            help='Только строки с id больше этого.',
+        )
+        parser.add_argument(
+            '--since',
+            help='Только строки не старше даты (ISO 8601).',
+        )
+
+    def handle(self, *args, **options):
+        name = options['model']
+        since = None
+        if options['since']:
+            since = parse_since(options['since'])
+        if since is not None and EXPORTS[name][2] is None:
+            raise CommandError(f'У выгрузки {name} нет даты, есть --since-id.')
+        self.last_id = None
+        rows = self.track(get_rows(
+            name, since_id=options['since_id'], since=since
+        ))
+        lines = serialize(name, rows, options['format'])
+        if options['output']:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as stream:
+                stream.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
+        # Отчёт в stderr, чтобы не смешивать его с выгрузкой в stdout.
+        self.stderr.write(
+            f'Выгружено строк: {self.count}, последний id: {self.last_id}'
+        )
+
+    def track(self, rows):
+        self.count = 0
+        for row in rows:
+            self.count += 1
+            self.last_id = row['id']
+            yield row
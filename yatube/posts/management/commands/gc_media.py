@@ -0,0 +1,86 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from sorl.thumbnail import delete
+from sorl.thumbnail.images import ImageFile
+
+from posts.images import delete_siblings, is_sibling
+from posts.models import Post
+from posts.storage import walk
+
+
+BATCH_SIZE: int = 500
+GRACE_HOURS: int = 24
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые не ссылается ни один пост, '
+        'вместе с их миниатюрами и копиями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=GRACE_HOURS,
+            help=(
+                'Не трогать файлы моложе стольких часов: пост с только '
+                'что загруженной картинкой мог ещё не сохраниться.'
+            ),
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, ничего не удаляя.',
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        self.storage = field.storage
+        self.dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        self.total = self.removed = self.freed = 0
+        names = walk(self.storage, field.upload_to)
+        while True:
+            batch = list(islice(names, BATCH_SIZE))
+            if not batch:
+                break
+            self.collect(batch, cutoff)
+        verb = 'можно удалить' if self.dry_run else 'удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов: {self.total}, {verb}: {self.removed}, '
+            f'{self.freed / (1024 * 1024):.1f} МБ.'
+        ))
+
+    def collect(self, batch, cutoff):
+        siblings = [name for name in batch if is_sibling(name)]
+        images = [name for name in batch if not is_sibling(name)]
+        referenced = set(Post.objects.filter(image__in=images).values_list(
+            'image', flat=True
+        ))
+        for name in images:
+            self.total += 1
+            if name in referenced:
+                continue
+            if self.storage.get_modified_time(name) > cutoff:
+                continue
+            self.remove(name, self.storage.size(name))
+        # Копии, у которых картинки уже нет.
+        for name in siblings:
+            base = name.rsplit('.', 1)[0]
+            if self.storage.exists(name) and not self.storage.exists(base):
+                self.remove(name, self.storage.size(name), sibling=True)
+
+    def remove(self, name, size, sibling=False):
+        self.removed += 1
+        self.freed += size
+        if self.dry_run:
+            return
+        if sibling:
+            self.storage.delete(name)
+            return
+        delete(ImageFile(name, self.storage))
+        delete_siblings(self.storage, name)
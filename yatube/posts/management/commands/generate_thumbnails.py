@@ -0,0 +1,73 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from posts.images import get_storage, is_sibling
+from posts.models import Post
+from posts.storage import walk
+from posts.thumbnails import generate, get_workers, make_pool
+
+
+BATCH_SIZE: int = 1000
+
+
+def batches(names, size):
+    names = iter(names)
+    while True:
+        batch = list(islice(names, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Заранее нарезает миниатюры для уже загруженных картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=get_workers(),
+            help='Число процессов; 0 - резать в текущем процессе.',
+        )
+        parser.add_argument(
+            '--from-storage',
+            action='store_true',
+            help=(
+                'Обойти все файлы в MEDIA_ROOT/posts/, а не только '
+                'картинки, на которые ссылаются посты.'
+            ),
+        )
+
+    def get_names(self, from_storage):
+        upload_to = Post._meta.get_field('image').upload_to
+        if from_storage:
+            return (
+                name for name in walk(get_storage(), upload_to)
+                if not is_sibling(name)
+            )
+        return Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True
+        ).distinct().iterator()
+
+    def handle(self, *args, **options):
+        names = self.get_names(options['from_storage'])
+        done = failed = 0
+        pool = make_pool(options['workers']) if options['workers'] else None
+        try:
+            for batch in batches(names, BATCH_SIZE):
+                if pool is None:
+                    results = map(generate, batch)
+                else:
+                    results = pool.map(generate, batch)
+                for result in results:
+                    if result is None:
+                        failed += 1
+                    else:
+                        done += 1
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово картинок: {done}, с ошибками: {failed}.'
+        ))
@@ -0,0 +1,218 @@
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import search, thumbnails, timeline
+from posts.caching import INDEX, author_key, bump, group_key
+from posts.counters import change_author_counter
+from posts.groups import get_group
+from posts.models import Post, User
+
+
+BATCH_SIZE: int = 1000
+FORMATS = ('jsonl', 'csv')
+
+
+class RecordError(ValueError):
+    pass
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield RecordError(f'не JSON: {error}')
+            continue
+        if not isinstance(record, dict):
+            yield RecordError('ожидался объект JSON')
+            continue
+        yield record
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+def parse_pub_date(value):
+    if not value:
+        return None
+    date = parse_datetime(value)
+    if date is None:
+        raise RecordError(f'неверная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из JSONL или CSV с полями text, author (username), '
+        'group (slug), pub_date (ISO 8601) и image (путь в MEDIA_ROOT).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами; «-» - stdin.')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла; по умолчанию - по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Постов в одной транзакции.',
+        )
+        parser.add_argument(
+            '--skip-thumbnails',
+            action='store_true',
+            help='Не ставить нарезку миниатюр; потом generate_thumbnails.',
+        )
+
+    def get_format(self, path, fmt):
+        if fmt:
+            return fmt
+        for fmt in FORMATS:
+            if path.endswith('.' + fmt):
+                return fmt
+        raise CommandError('Укажите --format: jsonl или csv.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        reader = read_csv if self.get_format(
+            path, options['format']
+        ) == 'csv' else read_jsonl
+        self.authors = {}
+        self.imported = self.skipped = 0
+        started = time.perf_counter()
+        if path == '-':
+            self.load(reader(sys.stdin), options)
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                self.load(reader(stream), options)
+        elapsed = time.perf_counter() - started
+        rate = self.imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано постов: {self.imported}, '
+            f'пропущено: {self.skipped}, '
+            f'за {elapsed:.1f} с ({rate:.0f} постов/с).'
+        ))
+
+    def load(self, records, options):
+        records = enumerate(records, start=1)
+        while True:
+            batch = list(islice(records, options['batch_size']))
+            if not batch:
+                return
+            posts = self.build(batch)
+            if posts:
+                self.save(posts, options['skip_thumbnails'])
+                self.invalidate(posts)
+            self.imported += len(posts)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Импортировано постов: {self.imported}')
+
+    def resolve_authors(self, batch):
+        """Дозагружает одним запросом авторов пачки, которых ещё нет."""
+        names = {
+            str(record.get('author') or '')
+            for _, record in batch if isinstance(record, dict)
+        } - self.authors.keys()
+        if not names:
+            return
+        found = dict(
+            User.objects.filter(username__in=names).values_list(
+                'username', 'pk'
+            )
+        )
+        for name in names:
+            self.authors[name] = found.get(name)
+
+    def build(self, batch):
+        """Посты пачки в паре с датой публикации из файла."""
+        self.resolve_authors(batch)
+        posts = []
+        for number, record in batch:
+            try:
+                posts.append(self.build_post(record))
+            except RecordError as error:
+                self.skipped += 1
+                self.stderr.write(f'Запись {number} пропущена: {error}')
+        return posts
+
+    def build_post(self, record):
+        if isinstance(record, RecordError):
+            raise record
+        text = (record.get('text') or '').strip()
+        if not text:
+            raise RecordError('пустой текст')
+        author = str(record.get('author') or '')
+        author_id = self.authors.get(author)
+        if author_id is None:
+            raise RecordError(f'нет пользователя {author!r}')
+        group = None
+        if record.get('group'):
+            group = get_group(record['group'])
+            if group is None:
+                raise RecordError(f'нет группы {record["group"]!r}')
+        post = Post(
+            text=text,
+            author_id=author_id,
+            group=group,
+            image=record.get('image') or '',
+        )
+        return post, parse_pub_date(record.get('pub_date'))
+
+    @transaction.atomic
+    def save(self, posts, skip_thumbnails):
+        posts, dates = zip(*posts)
+        Post.objects.bulk_create(posts)
+        if posts[0].pk is None:
+            # SQLite не возвращает id из bulk_create. Транзакция держит
+            # запись, поэтому последние id таблицы - строки этой пачки.
+            ids = Post.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            )[:len(posts)]
+            for post, pk in zip(posts, reversed(list(ids))):
+                post.pk = pk
+        # auto_now_add не даёт сохранить дату из файла при вставке.
+        dated = []
+        for post, pub_date in zip(posts, dates):
+            if pub_date is not None:
+                post.pub_date = post.updated = pub_date
+                dated.append(post)
+        Post.objects.bulk_update(dated, ['pub_date', 'updated'])
+        for author_id, count in Counter(
+            post.author_id for post in posts
+        ).items():
+            change_author_counter(author_id, 'posts_count', count)
+        search.index_posts((post.pk, post.text) for post in posts)
+        timeline.fan_out_many(posts)
+        if not skip_thumbnails:
+            for post in posts:
+                thumbnails.schedule(post.image)
+
+    def invalidate(self, posts):
+        author_ids = {post.author_id for post, _ in posts}
+        usernames = {
+            name for name, pk in self.authors.items() if pk in author_ids
+        }
+        slugs = {post.group.slug for post, _ in posts if post.group}
+        bump(
+            INDEX,
+            *(author_key(name) for name in usernames),
+            *(group_key(slug) for slug in slugs),
+        )
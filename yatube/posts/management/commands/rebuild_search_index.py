@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Собирает поисковый индекс постов заново.'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.values_list('pk', 'text').order_by().iterator()
+        total = search.rebuild(posts)
+        self.stdout.write(
+            self.style.SUCCESS(f'Постов в поисковом индексе: {total}')
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Собирает ленты подписок заново по текущим подпискам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='id пользователя, чью ленту нужно собрать; можно повторять.',
+        )
+
+    def handle(self, *args, **options):
+        if not timeline.is_enabled():
+            self.stdout.write('Лента подписок выключена (POSTS_TIMELINE).')
+            return
+        timeline.rebuild(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS('Ленты подписок собраны.'))
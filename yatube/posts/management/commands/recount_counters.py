@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import rebuild_author_counters, rebuild_comments_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов, комментариев и подписок '
+        'и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только показать расхождения, ничего не исправляя.',
+        )
+
+    def handle(self, *args, **options):
+        commit = not options['check']
+        authors = rebuild_author_counters(commit=commit)
+        posts = rebuild_comments_counters(commit=commit)
+        verb = 'Исправлено' if commit else 'Найдено расхождений'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb}: авторов {authors}, постов {posts}.'
+        ))
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def fill_search(apps, schema_editor):
+    from posts import search
+    Post = apps.get_model('posts', 'Post')
+    search.rebuild(Post.objects.values_list('pk', 'text').iterator())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE VIRTUAL TABLE posts_search USING fts5("
+            "terms, tokenize = 'unicode61 remove_diacritics 0')",
+            'DROP TABLE posts_search',
+        ),
+        migrations.RunPython(fill_search, migrations.RunPython.noop),
+    ]
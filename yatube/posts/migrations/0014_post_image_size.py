@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:04
+
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def fill_image_size(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.exclude(image='').only('image').order_by('pk')
+    sized = []
+    for post in posts.iterator():
+        try:
+            with default_storage.open(post.image.name) as file:
+                post.image_width, post.image_height = (
+                    get_image_dimensions(file)
+                )
+        except OSError:
+            continue
+        sized.append(post)
+    Post.objects.bulk_update(
+        sized, ['image_width', 'image_height'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_comment_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.RunPython(fill_image_size, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,200 @@
+import datetime
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+
+AFTER_PARAM: str = 'cursor'
+BEFORE_PARAM: str = 'before'
+PAGE_PARAM: str = 'page'
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(date, pk):
+    """Упаковывает ключ (дата, id) в строку для адреса страницы."""
+    delta = date - EPOCH
+    microseconds = (
+        (delta.days * 86400 + delta.seconds) * 10 ** 6 + delta.microseconds
+    )
+    return f'{microseconds}.{pk}'
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор; для испорченного значения возвращает None."""
+    try:
+        microseconds, pk = cursor.split('.')
+        date = EPOCH + datetime.timedelta(microseconds=int(microseconds))
+        return date, int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+class CursorPage(Page):
+    """Страница ленты, у которой вместо номера есть курсоры соседей."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page {self.previous_cursor}..{self.next_cursor}>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (дата, id) без COUNT и OFFSET.
+
+    Каждая страница выбирается одним запросом вида
+    ``WHERE (date, id) < cursor ORDER BY date DESC, id DESC LIMIT n + 1``,
+    поэтому сотая страница стоит столько же, сколько первая.
+    Старые ссылки ``?page=N`` обслуживаются обычным ``Paginator``.
+    """
+
+    def __init__(self, object_list, per_page, date_field='pub_date',
+                 pk_field='pk', **kwargs):
+        self.date_field = date_field
+        self.pk_field = pk_field
+        object_list = object_list.order_by(f'-{date_field}', f'-{pk_field}')
+        super().__init__(object_list, per_page, **kwargs)
+
+    def get_cursor(self, obj):
+        return encode_cursor(
+            getattr(obj, self.date_field), getattr(obj, self.pk_field)
+        )
+
+    def keyset(self, key, reverse=False):
+        """Записи строго после ключа (дата, id) или перед ним."""
+        date, pk = key
+        if reverse:
+            keyset = (
+                Q(**{f'{self.date_field}__gt': date})
+                | Q(**{self.date_field: date, f'{self.pk_field}__gt': pk})
+            )
+            queryset = self.object_list.filter(keyset).reverse()
+        else:
+            keyset = (
+                Q(**{f'{self.date_field}__lt': date})
+                | Q(**{self.date_field: date, f'{self.pk_field}__lt': pk})
+            )
+            queryset = self.object_list.filter(keyset)
+        return queryset
+
+    def fetch(self, key=None, reverse=False):
+        """Одна страница записей и ещё одна, чтобы узнать о следующей."""
+        queryset = self.object_list
+        if key is not None:
+            queryset = self.keyset(key, reverse)
+        return list(queryset[:self.per_page + 1])
+
+    def first_page(self):
+        return self._page_after(self.fetch(), None)
+
+    def page_after(self, cursor):
+        """Страница записей, идущих следом за курсором."""
+        key = decode_cursor(cursor)
+        if key is None:
+            return self.first_page()
+        return self._page_after(self.fetch(key), cursor)
+
+    def page_before(self, cursor):
+        """Страница записей, идущих перед курсором."""
+        key = decode_cursor(cursor)
+        if key is None:
+            return self.first_page()
+        posts = self.fetch(key, reverse=True)
+        if len(posts) <= self.per_page:
+            return self.first_page()
+        posts = posts[:self.per_page][::-1]
+        return CursorPage(
+            posts,
+            self,
+            next_cursor=self.get_cursor(posts[-1]),
+            previous_cursor=self.get_cursor(posts[0]),
+        )
+
+    def _page_after(self, posts, cursor):
+        next_cursor = None
+        if len(posts) > self.per_page:
+            posts = posts[:self.per_page]
+            next_cursor = self.get_cursor(posts[-1])
+        previous_cursor = None
+        if cursor is not None and posts:
+            previous_cursor = self.get_cursor(posts[0])
+        return CursorPage(
+            posts,
+            self,
+            next_cursor=next_cursor,
+            previous_cursor=previous_cursor,
+        )
+
+    def get_page_from_query(self, query):
+        """Выбирает страницу по параметрам запроса.
+
+        ``?cursor=`` и ``?before=`` листают ленту по ключу,
+        ``?page=N`` оставлен для старых ссылок.
+        """
+        if AFTER_PARAM in query:
+            return self.page_after(query[AFTER_PARAM])
+        if BEFORE_PARAM in query:
+            return self.page_before(query[BEFORE_PARAM])
+        if PAGE_PARAM in query:
+            return self.get_page(query[PAGE_PARAM])
+        return self.first_page()
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который не считает строки всей таблицы.
+
+    Без фильтров число строк оценивается по наибольшему id: это один
+    проход по первичному ключу вместо COUNT(*) по всей таблице. Удалённые
+    строки в оценку попадают, поэтому последние страницы могут оказаться
+    неполными. С фильтрами строки считаются честно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            return super().count
+        newest = queryset.model._default_manager.aggregate(
+            newest=Max('pk')
+        )['newest']
+        return newest or 0
+
+
+def page_window(number, num_pages, on_each_side=2, on_ends=1):
+    """Номера страниц для строки навигации: края и окно вокруг текущей.
+
+    Пропуск обозначается ``None``: для 1000 страниц и текущей 500 это
+    1, None, 498, ..., 502, None, 1000. Длина строки не зависит от
+    числа страниц.
+    """
+    window = range(
+        max(number - on_each_side, 1),
+        min(number + on_each_side, num_pages) + 1,
+    )
+    shown = sorted({
+        *range(1, min(on_ends, num_pages) + 1),
+        *window,
+        *range(max(num_pages - on_ends + 1, 1), num_pages + 1),
+    })
+    pages = []
+    for page in shown:
+        if pages and page - pages[-1] == 2:
+            # Пропуск в одну страницу короче показать номером.
+            pages.append(page - 1)
+        elif pages and page - pages[-1] > 2:
+            pages.append(None)
+        pages.append(page)
+    return pages
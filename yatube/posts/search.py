@@ -0,0 +1,242 @@
+"""Полнотекстовый поиск по постам.
+
+Индекс - виртуальная таблица SQLite FTS5, где у каждого поста (rowid =
+id поста) хранится текст из основ слов. Основы русских слов отрезает
+стеммер Snowball, поэтому «котов» находится по запросу «коты». Индекс
+обновляют сигналы сохранения и удаления поста.
+"""
+import re
+
+from django.db import connection
+
+from .models import Post
+
+
+TABLE = 'posts_search'
+REBUILD_BATCH: int = 1000
+
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'[а-я]')
+VOWELS = 'аеиоуыэюя'
+
+# Окончания Snowball для русского языка. Окончания первой группы
+# отрезаются, только если перед ними стоит «а» или «я».
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = ((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+))
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+
+def _sorted(groups):
+    after_a, free = groups
+    endings = [(ending, True) for ending in after_a]
+    endings += [(ending, False) for ending in free]
+    return sorted(endings, key=lambda item: -len(item[0]))
+
+
+PERFECTIVE_GERUND = _sorted(PERFECTIVE_GERUND)
+ADJECTIVE = _sorted(ADJECTIVE)
+PARTICIPLE = _sorted(PARTICIPLE)
+REFLEXIVE = _sorted(REFLEXIVE)
+VERB = _sorted(VERB)
+NOUN = _sorted(NOUN)
+
+
+def _cut(rv, endings):
+    """rv без самого длинного подходящего окончания или None."""
+    for ending, after_a in endings:
+        if not rv.endswith(ending):
+            continue
+        stem = rv[:-len(ending)]
+        if after_a and not stem.endswith(('а', 'я')):
+            continue
+        return stem
+    return None
+
+
+def _regions(word):
+    """Начала областей RV и R2 из описания стеммера Snowball."""
+    rv = r1 = r2 = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def _remove_inflection(rv):
+    """Шаг 1 Snowball: деепричастие или возвратность и окончание."""
+    cut = _cut(rv, PERFECTIVE_GERUND)
+    if cut is not None:
+        return cut
+    cut = _cut(rv, REFLEXIVE)
+    if cut is not None:
+        rv = cut
+    cut = _cut(rv, ADJECTIVE)
+    if cut is not None:
+        participle = _cut(cut, PARTICIPLE)
+        return cut if participle is None else participle
+    for endings in (VERB, NOUN):
+        cut = _cut(rv, endings)
+        if cut is not None:
+            return cut
+    return rv
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball."""
+    word = word.lower().replace('ё', 'е')
+    rv_start, r2_start = _regions(word)
+    prefix = word[:rv_start]
+    rv = _remove_inflection(word[rv_start:])
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending) and (
+            rv_start + len(rv) - len(ending) >= r2_start
+        ):
+            rv = rv[:-len(ending)]
+            break
+    for ending in SUPERLATIVE:
+        if rv.endswith(ending):
+            rv = rv[:-len(ending)]
+            break
+    if rv.endswith('нн') or rv.endswith('ь'):
+        rv = rv[:-1]
+    return prefix + rv
+
+
+def to_terms(text):
+    """Основы слов текста через пробел; нерусские слова как есть."""
+    terms = []
+    for word in WORD.findall(text.lower().replace('ё', 'е')):
+        terms.append(stem(word) if CYRILLIC.search(word) else word)
+    return ' '.join(terms)
+
+
+def to_match(query):
+    """Выражение FTS5: все основы запроса, каждая в кавычках."""
+    terms = dict.fromkeys(to_terms(query).split())
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def index_post(post_id, text):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, terms) VALUES (%s, %s)',
+            [post_id, to_terms(text)],
+        )
+
+
+def index_posts(posts):
+    """Добавляет в индекс новые посты по парам (id, текст)."""
+    with connection.cursor() as cursor:
+        return _insert(
+            cursor, [(post_id, to_terms(text)) for post_id, text in posts]
+        )
+
+
+def unindex_post(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild(posts):
+    """Заполняет индекс заново по парам (id, текст); возвращает число."""
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        batch = []
+        for post_id, text in posts:
+            batch.append((post_id, to_terms(text)))
+            if len(batch) >= REBUILD_BATCH:
+                total += _insert(cursor, batch)
+                batch = []
+        total += _insert(cursor, batch)
+    return total
+
+
+def _insert(cursor, rows):
+    if rows:
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, terms) VALUES (%s, %s)', rows
+        )
+    return len(rows)
+
+
+class SearchResults:
+    """Найденные посты по убыванию релевантности (BM25), для Paginator.
+
+    Считает совпадения и читает срезы прямо из индекса, а посты
+    текущей страницы достаёт одним запросом.
+    """
+
+    def __init__(self, query):
+        self.match = to_match(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {TABLE} WHERE {TABLE} MATCH %s',
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('Результаты поиска читаются только срезами')
+        if not self.match:
+            return []
+        start = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+                f'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [self.match, index.stop - start, start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,150 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import (
+    GROUP_LIST, GROUPS, INDEX, author_key, bump, group_key, post_key
+)
+from .counters import change_author_counter, change_comments_counter
+from .models import Comment, Follow, Group, Post, User
+from . import images, search, timeline
+
+
+def invalidate_post(post, group_ids):
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    bump(
+        INDEX,
+        author_key(post.author.username),
+        post_key(post.pk),
+        *(group_key(slug) for slug in slugs),
+    )
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, raw=False, **kwargs):
+    instance._saved_group_id = None
+    if not raw:
+        images.prepare(instance)
+    if not instance._state.adding and not raw:
+        instance._saved_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        change_author_counter(instance.author_id, 'posts_count', 1)
+        timeline.fan_out(instance)
+    search.index_post(instance.pk, instance.text)
+    saved_group_id = getattr(instance, '_saved_group_id', None)
+    invalidate_post(instance, {instance.group_id, saved_group_id})
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_author_counter(instance.author_id, 'posts_count', -1)
+    search.unindex_post(instance.pk)
+    invalidate_post(instance, {instance.group_id})
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_comments_counter(instance.post_id, 1)
+    bump(post_key(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_comments_counter(instance.post_id, -1)
+    bump(post_key(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_author_counter(instance.author_id, 'followers_count', 1)
+        change_author_counter(instance.user_id, 'following_count', 1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        bump(author_key(instance.author.username))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_author_counter(instance.author_id, 'followers_count', -1)
+    change_author_counter(instance.user_id, 'following_count', -1)
+    timeline.prune(instance.user_id, instance.author_id)
+    timeline.follower_lost(instance.author_id)
+    bump(author_key(instance.author.username))
+
+
+def invalidate_groups():
+    # Свой процесс перечитает группы сразу, в той же транзакции. Другие
+    # могли успеть перечитать старые строки до коммита, поэтому версия
+    # меняется ещё раз после него.
+    bump(GROUP_LIST)
+    transaction.on_commit(lambda: bump(GROUP_LIST))
+
+
+@receiver(pre_save, sender=Group)
+def group_changing(sender, instance, raw=False, **kwargs):
+    instance._saved_slug = None
+    if not instance._state.adding and not raw:
+        instance._saved_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    saved_slug = getattr(instance, '_saved_slug', None)
+    if saved_slug is not None and saved_slug != instance.slug:
+        # Ссылки на группу в карточках постов есть на всех лентах.
+        bump(group_key(saved_slug), group_key(instance.slug), GROUPS)
+    else:
+        bump(group_key(instance.slug))
+    invalidate_groups()
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    bump(group_key(instance.slug), GROUPS)
+    invalidate_groups()
+
+
+AUTHOR_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=User)
+def author_changing(sender, instance, raw=False, update_fields=None,
+                    **kwargs):
+    instance._saved_names = None
+    # Вход пользователя сохраняет только last_login.
+    if update_fields is not None and not (
+        set(update_fields) & set(AUTHOR_NAME_FIELDS)
+    ):
+        return
+    if not instance._state.adding and not raw:
+        instance._saved_names = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*AUTHOR_NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, raw=False, **kwargs):
+    saved_names = getattr(instance, '_saved_names', None)
+    names = tuple(getattr(instance, field) for field in AUTHOR_NAME_FIELDS)
+    if saved_names is None or saved_names == names:
+        return
+    # Имя автора выводится в карточках постов на всех лентах.
+    bump(
+        INDEX,
+        GROUPS,
+        author_key(saved_names[0]),
+        author_key(instance.username),
+    )
@@ -0,0 +1,76 @@
+"""Хранилище картинок постов с именами по содержимому.
+
+Файл называется sha256 своих байтов: ``posts/3f/3f9a...e1.jpg``.
+Одинаковые загрузки получают одно имя, поэтому на диске лежит один
+файл, а sorl режет для него один набор миниатюр. Ссылки на файл - это
+посты с таким ``image``; файлы без ссылок удаляет команда gc_media.
+"""
+import hashlib
+import os
+import posixpath
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+CHUNK_SIZE: int = 64 * 1024
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class HashedStorage(FileSystemStorage):
+    """Файлы в MEDIA_ROOT под именем из хеша содержимого.
+
+    Каталог из ``upload_to`` и расширение сохраняются. Если файл с таким
+    хешем уже есть, новые байты не пишутся, а время изменения файла
+    обновляется: gc_media не удалит его, пока пост с ним не сохранён.
+    """
+
+    def hashed_name(self, name, content):
+        directory, basename = posixpath.split(name)
+        ext = posixpath.splitext(basename)[1].lower()
+        digest = content_hash(content)
+        return posixpath.join(directory, digest[:2], digest + ext)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                # gc_media успел удалить файл - пишем его заново.
+                pass
+        # Параллельная загрузка тех же байтов может успеть раньше, тогда
+        # FileSystemStorage сохранит копию под именем с суффиксом.
+        return super().save(name, content, max_length=max_length)
+
+    def save_as(self, name, content):
+        """Сохраняет под данным именем: для копий в других форматах."""
+        return super().save(name, content)
+
+
+def walk(storage, path):
+    """Имена всех файлов каталога хранилища, включая подкаталоги."""
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield posixpath.join(path, name)
+    for directory in directories:
+        yield from walk(storage, posixpath.join(path, directory))
@@ -0,0 +1,14 @@
+from django import template
+
+from posts.paginator import page_window
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_range(page_obj, on_each_side=2, on_ends=1):
+    """Номера страниц вокруг текущей; ``None`` - пропуск, см. page_window."""
+    return page_window(
+        page_obj.number, page_obj.paginator.num_pages, on_each_side, on_ends
+    )
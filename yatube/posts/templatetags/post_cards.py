@@ -0,0 +1,49 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from posts import images, thumbnails
+from posts.caching import CARD_TIMEOUT, card_key
+
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, group=None):
+    """HTML карточек постов страницы в порядке постов.
+
+    Готовые карточки читаются из кеша одним get_many, шаблон
+    рендерится только для недостающих.
+    """
+    posts = list(posts)
+    keys = [card_key(post, hide_group=group is not None) for post in posts]
+    cards = cache.get_many(keys)
+    missing = [
+        (key, post) for key, post in zip(keys, posts) if key not in cards
+    ]
+    if missing:
+        card_template = get_template(CARD_TEMPLATE)
+        with thumbnails.prefetched(post for _, post in missing):
+            rendered = {
+                key: card_template.render({'post': post, 'group': group})
+                for key, post in missing
+            }
+        cache.set_many(rendered, CARD_TIMEOUT)
+        cards.update(rendered)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+@register.simple_tag
+def image_size(post, thumbnail, geometry, crop=None, upscale=None):
+    """Ширина и высота миниатюры картинки поста по полям поста.
+
+    Если размеры в посте не записаны, их даёт сама миниатюра.
+    """
+    size = images.thumbnail_size(
+        post.image_width, post.image_height, geometry, crop, upscale
+    )
+    return size or (thumbnail.width, thumbnail.height)
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.tests.utils import ROW_COUNTS, create_posts
+
+
+User = get_user_model()
+
+
+class PostChangelistTest(TestCase):
+    """Список постов в админке не зависит от размера таблицы."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries]
+
+    def test_changelist_queries_are_constant(self):
+        """Число запросов списка одинаково при 1, 100 и 10 000 постах"""
+        counts = set()
+        for rows in ROW_COUNTS:
+            create_posts(self.admin, rows - Post.objects.count(), self.group)
+            # Первая выдача загружает группы в память процесса.
+            self.get()
+            _, queries = self.get()
+            counts.add(len(queries))
+            full_counts = [
+                sql for sql in queries
+                if 'COUNT(*)' in sql and 'FROM "posts_post"' in sql
+            ]
+            self.assertEqual(full_counts, [], rows)
+        self.assertEqual(len(counts), 1, counts)
+
+    def test_group_column_is_autocomplete(self):
+        """Группа в строке списка - автодополнение без полного списка"""
+        other = Group.objects.create(
+            title='Другая группа', slug='other', description='Описание'
+        )
+        Post.objects.create(author=self.admin, text='Пост', group=self.group)
+        response, _ = self.get()
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(response, 'Тестовая группа')
+        self.assertNotContains(response, other.title)
+
+    def test_search_uses_index(self):
+        """Поиск в админке идёт по поисковому индексу"""
+        Post.objects.create(author=self.admin, text='Коты спят')
+        Post.objects.create(author=self.admin, text='Собака гуляет')
+        response, queries = self.get(q='кот')
+        self.assertEqual(
+            [post.text for post in response.context['cl'].result_list],
+            ['Коты спят'],
+        )
+        self.assertFalse(any('LIKE' in sql for sql in queries))
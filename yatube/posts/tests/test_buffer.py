@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.buffer import CommentBuffer
+from posts.models import Comment, Post
+
+
+User = get_user_model()
+
+
+class CommentBufferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Текст')
+        cls.other = Post.objects.create(author=cls.user, text='Текст')
+
+    def setUp(self):
+        self.buffer = CommentBuffer(batch_size=3)
+
+    def test_flush_writes_batches(self):
+        """Очередь пишется пачками, счётчики постов обновляются"""
+        for i in range(4):
+            self.buffer.add(self.post.pk, self.user.pk, f'Комментарий {i}')
+        self.buffer.add(self.other.pk, self.user.pk, 'Комментарий')
+        with mock.patch.object(
+            Comment.objects, 'bulk_create', wraps=Comment.objects.bulk_create
+        ) as bulk_create:
+            self.assertEqual(self.buffer.flush(), 5)
+        self.assertEqual(bulk_create.call_count, 2)
+        self.assertEqual(len(self.buffer), 0)
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 4)
+        self.assertEqual(self.other.comments_count, 1)
+        self.assertEqual(self.post.comments.count(), 4)
+
+    def test_missing_post_is_skipped(self):
+        """Комментарий к удалённому посту отбрасывается"""
+        self.buffer.add(self.other.pk + 100, self.user.pk, 'Комментарий')
+        self.buffer.add(self.post.pk, self.user.pk, 'Комментарий')
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_locked_database_is_retried(self):
+        """Пачка повторяется, пока база занята"""
+        self.buffer.add(self.post.pk, self.user.pk, 'Комментарий')
+        write = self.buffer._write
+        errors = [OperationalError('database is locked')]
+
+        def locked_once(batch):
+            if errors:
+                raise errors.pop()
+            return write(batch)
+        with mock.patch.object(
+            self.buffer, '_write', side_effect=locked_once
+        ), mock.patch('posts.buffer.time.sleep') as sleep:
+            self.assertEqual(self.buffer.flush(), 1)
+        sleep.assert_called_once()
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_failed_batch_stays_queued(self):
+        """Несохранённая пачка остаётся в очереди до следующего такта"""
+        for i in range(3):
+            self.buffer.add(self.post.pk, self.user.pk, f'Комментарий {i}')
+        with mock.patch.object(
+            self.buffer, '_write',
+            side_effect=OperationalError('database is locked'),
+        ), mock.patch('posts.buffer.time.sleep'), self.assertLogs(
+            'posts.buffer', 'ERROR'
+        ):
+            self.assertEqual(self.buffer.flush(), 0)
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(len(self.buffer), 3)
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(
+            list(self.post.comments.order_by('pk').values_list(
+                'text', flat=True
+            )),
+            [f'Комментарий {i}' for i in range(3)],
+        )
+
+    @override_settings(POSTS_COMMENT_BUFFER=True)
+    def test_view_queues_comment(self):
+        """Представление ставит комментарий в очередь, не записывая его"""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        with mock.patch(
+            'posts.buffer.get_comment_buffer', return_value=self.buffer
+        ):
+            response = client.post(url, {'text': 'Комментарий'})
+            client.post(url, {'text': ''})
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        ))
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(len(self.buffer), 1)
+        self.buffer.flush()
+        self.assertTrue(self.post.comments.filter(text='Комментарий'))
@@ -0,0 +1,366 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date, parse_http_date
+
+from posts.caching import (
+    GROUPS, INDEX, VERSION_PREFIX, author_key, get_versions, group_key,
+    post_key
+)
+from posts.models import Comment, Group, Post
+from posts.templatetags import post_cards
+from posts.views import COUNT_POSTS
+
+
+User = get_user_model()
+
+
+class CacheVersionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый текст', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertBumped(self, action, bumped, kept=()):
+        names = (*bumped, *kept)
+        before = dict(zip(names, get_versions(*names)))
+        action()
+        after = dict(zip(names, get_versions(*names)))
+        for name in bumped:
+            self.assertNotEqual(before[name], after[name], name)
+        for name in kept:
+            self.assertEqual(before[name], after[name], name)
+
+    def test_versions_are_stable(self):
+        """Версия без изменений не меняется"""
+        self.assertEqual(get_versions(INDEX), get_versions(INDEX))
+
+    def test_post_edit_bumps_both_groups(self):
+        """Перенос поста в другую группу сбрасывает обе группы"""
+        def move():
+            self.post.group = self.other
+            self.post.save()
+        self.assertBumped(
+            move,
+            bumped=(
+                INDEX, author_key('auth'), post_key(self.post.pk),
+                group_key('test-slug'), group_key('other-slug'),
+            ),
+            kept=(GROUPS,),
+        )
+
+    def test_comment_bumps_only_post(self):
+        """Комментарий сбрасывает только свой пост"""
+        self.assertBumped(
+            lambda: Comment.objects.create(
+                post=self.post, author=self.user, text='Комментарий'
+            ),
+            bumped=(post_key(self.post.pk),),
+            kept=(INDEX, author_key('auth'), group_key('test-slug')),
+        )
+
+    def test_group_slug_change_bumps_all_feeds(self):
+        """Смена адреса группы сбрасывает все ленты со ссылками на неё"""
+        def rename():
+            self.other.slug = 'renamed'
+            self.other.save()
+        self.assertBumped(
+            rename,
+            bumped=(GROUPS, group_key('other-slug'), group_key('renamed')),
+            kept=(group_key('test-slug'),),
+        )
+
+    def test_author_rename_bumps_feeds(self):
+        """Смена имени автора сбрасывает ленты с его карточками"""
+        def rename():
+            self.user.first_name = 'Лев'
+            self.user.save()
+        self.assertBumped(
+            rename, bumped=(INDEX, GROUPS, author_key('auth'))
+        )
+
+    def test_login_keeps_versions(self):
+        """Вход пользователя не сбрасывает ленты"""
+        def login():
+            self.user.save(update_fields=['last_login'])
+        self.assertBumped(login, bumped=(), kept=(INDEX, GROUPS))
+
+
+class PostCardsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Иван', last_name='Петров'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(COUNT_POSTS):
+            Post.objects.create(
+                author=cls.user, text=f'Тестовый текст {i}', group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, group=None):
+        return ''.join(post_cards.post_cards(Post.objects.feed(), group))
+
+    def test_cached_page_skips_templates(self):
+        """Закешированная страница - один get_many и ни одного шаблона"""
+        first = self.render()
+        self.assertEqual(first.count('<article>'), COUNT_POSTS)
+        with mock.patch.object(
+            post_cards, 'get_template'
+        ) as get_template, mock.patch.object(
+            cache, 'get_many', wraps=cache.get_many
+        ) as get_many:
+            self.assertEqual(self.render(), first)
+        get_template.assert_not_called()
+        get_many.assert_called_once()
+
+    def test_post_edit_renders_new_card(self):
+        """Правка поста сразу видна в его карточке"""
+        self.render()
+        post = Post.objects.first()
+        post.text = 'Новый текст'
+        post.save()
+        self.assertIn('Новый текст', self.render())
+
+    def test_author_rename_renders_new_cards(self):
+        """Новое имя автора выводится во всех карточках"""
+        self.render()
+        self.user.first_name = 'Лев'
+        self.user.save()
+        self.assertEqual(self.render().count('Лев Петров'), COUNT_POSTS)
+
+    def test_group_change_renders_new_cards(self):
+        """Новый адрес группы попадает в ссылки карточек"""
+        self.render()
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertEqual(
+            self.render().count('/group/renamed/'), COUNT_POSTS
+        )
+
+    def test_group_page_cards_have_no_group_link(self):
+        """На странице группы карточки без ссылки на группу"""
+        self.render()
+        self.assertNotIn('/group/', self.render(self.group))
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый текст', group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+        cache.clear()
+
+    def test_repeat_visit_is_not_rendered(self):
+        """Повторный и условный запросы не рендерят шаблон"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                with mock.patch('posts.views.render') as render:
+                    cached = self.guest_client.get(url)
+                    not_modified = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                render.assert_not_called()
+                self.assertEqual(cached.content, response.content)
+                self.assertEqual(not_modified.status_code, 304)
+
+    def test_repeat_visit_makes_no_queries(self):
+        """Повторный и условный запросы не ходят в базу"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    self.guest_client.get(url)
+                    self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+
+    def test_missing_pages_leave_no_versions(self):
+        """Адреса несуществующих групп и авторов не заводят версий"""
+        urls = (
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
+        self.assertEqual(
+            cache.get_many([
+                VERSION_PREFIX + group_key('missing'),
+                VERSION_PREFIX + author_key('missing'),
+            ]),
+            {},
+        )
+
+    def test_new_post_changes_etag(self):
+        """Новый пост меняет ETag и сразу виден"""
+        tags = [self.guest_client.get(url)['ETag'] for url in self.urls]
+        Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group
+        )
+        for url, tag in zip(self.urls, tags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=tag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Новый пост')
+
+    def test_if_modified_since_alone_is_not_trusted(self):
+        """Без ETag страница отдаётся целиком, Last-Modified видит правки"""
+        first = [self.guest_client.get(url) for url in self.urls]
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный текст'
+        post.save()
+        for url, response in zip(self.urls, first):
+            with self.subTest(url=url):
+                edited = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(edited.status_code, 200)
+                self.assertContains(edited, 'Исправленный текст')
+                self.assertGreaterEqual(
+                    parse_http_date(edited['Last-Modified']),
+                    parse_http_date(response['Last-Modified']),
+                )
+        # Удаление не сдвигает Last-Modified, поэтому 304 только по ETag.
+        post.delete()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=http_date()
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, 'Исправленный текст')
+
+    def test_authorized_pages_are_not_cached(self):
+        """Авторизованным страница собирается заново"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.auth_client.get(url)
+                self.assertFalse(response.has_header('ETag'))
+                self.assertIsNotNone(self.auth_client.get(url).context)
+
+
+class PostConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый текст')
+        cls.url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+
+    def revalidate(self, client, response):
+        return client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_post_is_not_modified(self):
+        """Неизменный пост - ответ 304 без запроса комментариев"""
+        response = self.guest_client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.revalidate(self.guest_client, response)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertFalse(
+            any('posts_comment' in query['sql'] for query in queries)
+        )
+        # Время правки точнее секунды, проверка идёт только по ETag.
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_comment_and_edit_change_validators(self):
+        """Комментарий, правка поста и имя автора дают полный ответ"""
+        changes = (
+            lambda: Comment.objects.create(
+                post=self.post, author=self.user, text='Комментарий'
+            ),
+            lambda: Post.objects.get(pk=self.post.pk).save(),
+            lambda: User.objects.filter(pk=self.user.pk).update(
+                first_name='Новое', last_name='Имя'
+            ),
+            lambda: User.objects.filter(pk=self.user.pk).update(
+                username='renamed'
+            ),
+        )
+        for change in changes:
+            response = self.guest_client.get(self.url)
+            change()
+            self.assertEqual(
+                self.revalidate(self.guest_client, response).status_code, 200
+            )
+
+    def test_new_login_gets_fresh_comment_form(self):
+        """После нового входа страница поста приходит с новым токеном"""
+        User.objects.create_user(username='reader', password='password')
+        client = Client()
+        credentials = {'username': 'reader', 'password': 'password'}
+        client.post(reverse('users:login'), credentials)
+        response = client.get(self.url)
+        self.assertEqual(self.revalidate(client, response).status_code, 304)
+        token = client.cookies['csrftoken'].value
+        client.get(reverse('users:logout'))
+        client.post(reverse('users:login'), credentials)
+        self.assertNotEqual(client.cookies['csrftoken'].value, token)
+        self.assertEqual(self.revalidate(client, response).status_code, 200)
+
+    def test_validators_differ_per_user(self):
+        """Страница гостя не подходит авторизованному"""
+        response = self.guest_client.get(self.url)
+        self.assertEqual(
+            self.auth_client.get(
+                self.url, HTTP_IF_NONE_MATCH=response['ETag']
+            ).status_code,
+            200,
+        )
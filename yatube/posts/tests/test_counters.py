@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.counters import get_stats
+from posts.models import AuthorStats, Comment, Follow, Post
+
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def stats(self, user):
+        return get_stats(User.objects.get(pk=user.pk))
+
+    def test_post_counter(self):
+        """Счётчик постов растёт при создании и падает при удалении"""
+        post = Post.objects.create(author=self.author, text='Текст')
+        Post.objects.create(author=self.author, text='Текст')
+        self.assertEqual(self.stats(self.author).posts_count, 2)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+
+    def test_comment_counter(self):
+        """Счётчик комментариев поста следит за комментариями"""
+        post = Post.objects.create(author=self.author, text='Текст')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка меняет счётчики обоих пользователей"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_new_user_has_zero_counters(self):
+        """У пользователя без записей счётчики нулевые"""
+        self.assertFalse(AuthorStats.objects.filter(user=self.reader))
+        self.assertEqual(self.stats(self.reader).posts_count, 0)
+
+    def test_recount_command_fixes_bulk_inserts(self):
+        """Команда recount_counters исправляет расхождения"""
+        Post.objects.bulk_create(
+            Post(author=self.author, text='Текст') for _ in range(3)
+        )
+        post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.reader, text='Комментарий')
+            for _ in range(2)
+        )
+        out = StringIO()
+        call_command('recount_counters', '--check', stdout=out)
+        self.assertIn('авторов 1, постов 1', out.getvalue())
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+        call_command('recount_counters', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 3)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
@@ -0,0 +1,98 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import export
+from posts.models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+
+
+class ExportFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def run_export(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command('export_feed', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_rows_are_read_in_chunks(self):
+        """Строки читаются пачками по id, а не одним запросом"""
+        with self.assertNumQueries(3):
+            rows = list(export.get_rows('posts', chunk_size=2))
+        self.assertEqual(
+            [row['id'] for row in rows], [post.pk for post in self.posts]
+        )
+
+    def test_jsonl_export(self):
+        """Посты выгружаются в формате import_posts"""
+        out, err = self.run_export('posts')
+        rows = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['text'], 'Пост 0')
+        self.assertEqual(rows[0]['author'], 'author')
+        self.assertEqual(rows[0]['group'], 'test-slug')
+        self.assertIn(f'последний id: {self.posts[-1].pk}', err)
+
+    def test_incremental_export(self):
+        """Выгрузка с отметки берёт только новые строки"""
+        out, _ = self.run_export(
+            'posts', '--since-id', str(self.posts[2].pk)
+        )
+        self.assertEqual(len(out.splitlines()), 2)
+        out, _ = self.run_export('posts', '--since', '2999-01-01')
+        self.assertEqual(out, '')
+
+    def test_csv_export(self):
+        """Комментарии и подписки выгружаются в CSV"""
+        out, _ = self.run_export('comments', '--format', 'csv')
+        rows = list(csv.DictReader(StringIO(out)))
+        self.assertEqual(rows[0]['text'], 'Комментарий')
+        out, _ = self.run_export('follows', '--format', 'csv')
+        rows = list(csv.DictReader(StringIO(out)))
+        self.assertEqual(
+            (rows[0]['user'], rows[0]['author']), ('reader', 'author')
+        )
+
+    def test_admin_action(self):
+        """Действие админки отдаёт выбранные посты потоком"""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'export_jsonl',
+                '_selected_action': [post.pk for post in self.posts[:2]],
+            },
+        )
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
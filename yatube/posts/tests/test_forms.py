@@ -74,7 +74,8 @@ class PostFormTests(TestCase):
         self.assertEqual(Post.objects.count(), posts_count + 1)
         self.assertTrue(Post.objects.filter(
             text=form_data['text'],
-            image='posts/small.gif',
+            image__startswith='posts/',
+            image__endswith='.gif',
         ).exists())
 
     def test_create_post_for_nonauth_client(self):
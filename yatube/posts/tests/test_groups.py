@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.forms import PostForm
+from posts.groups import get_group, get_group_by_id
+from posts.models import Group
+
+
+User = get_user_model()
+
+
+class GroupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+        cache.clear()
+        get_group('test-slug')
+
+    def test_lookup_without_queries(self):
+        """Группа по адресу и по id находится без запросов"""
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group('test-slug'), self.group)
+            self.assertEqual(get_group_by_id(str(self.group.pk)), self.group)
+            self.assertIsNone(get_group('missing'))
+            self.assertIsNone(get_group_by_id('abc'))
+
+    def test_form_without_queries(self):
+        """Список групп формы выводится и разбирается без запросов"""
+        field = PostForm().fields['group']
+        with self.assertNumQueries(0):
+            html = PostForm().as_p()
+            group = field.clean(str(self.group.pk))
+        self.assertIn('Тестовая группа', html)
+        self.assertEqual(group, self.group)
+
+    def test_form_rejects_unknown_group(self):
+        """Несуществующая группа не проходит проверку формы"""
+        form = PostForm(data={'text': 'Текст', 'group': 999})
+        self.assertFalse(form.is_valid())
+        self.assertIn('group', form.errors)
+
+    def test_changes_are_visible(self):
+        """Новая, изменённая и удалённая группы видны сразу"""
+        new = Group.objects.create(
+            title='Новая группа', slug='new-slug', description='Описание'
+        )
+        self.assertEqual(get_group('new-slug'), new)
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertIsNone(get_group('test-slug'))
+        self.assertEqual(get_group('renamed').pk, self.group.pk)
+        new.delete()
+        self.assertIsNone(get_group_by_id(new.pk))
+        response = self.auth_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'new-slug'})
+        )
+        self.assertEqual(response.status_code, 404)
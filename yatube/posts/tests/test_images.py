@@ -0,0 +1,148 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts.images import make_siblings, sibling_name, thumbnail_size
+from posts.models import Post
+
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+# Ориентация EXIF 6: снимок повёрнут на 90 градусов по часовой.
+ROTATED = 6
+
+
+def make_jpeg(size, orientation=None):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x0112] = orientation or 1
+    exif[0x010F] = 'Camera'
+    output = BytesIO()
+    image.save(output, 'JPEG', exif=exif.tobytes())
+    return output.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POSTS_IMAGE_MAX_SIDE=100,
+    POSTS_IMAGE_SIBLINGS=('webp',),
+)
+class ImagePipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create(self, name, content):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(name, content, 'image/jpeg'),
+        )
+
+    def test_upload_is_downscaled_and_stripped(self):
+        """Картинка уменьшается, поворачивается и теряет EXIF"""
+        post = self.create('photo.jpg', make_jpeg((400, 200), ROTATED))
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (50, 100))
+        with default_storage.open(post.image.name) as file:
+            image = Image.open(file)
+            self.assertEqual(image.size, (50, 100))
+            self.assertEqual(image.format, 'JPEG')
+            self.assertFalse(image.getexif())
+
+    def test_format_sets_extension(self):
+        """Расширение файла соответствует формату картинки"""
+        post = self.create('photo.bmp', make_jpeg((10, 20)))
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        self.assertEqual((post.image_width, post.image_height), (10, 20))
+
+    def test_edit_keeps_image(self):
+        """Правка поста не пересохраняет картинку"""
+        post = self.create('photo.jpg', make_jpeg((10, 20)))
+        name = post.image.name
+        post.text = 'Новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, name)
+        self.assertEqual(post.image_width, 10)
+
+    def test_form_rejects_large_upload(self):
+        """Форма не принимает картинку больше предела"""
+        client = Client()
+        client.force_login(self.user)
+        with self.settings(POSTS_IMAGE_MAX_UPLOAD=100):
+            response = client.post(reverse('posts:post_create'), {
+                'text': 'Большая картинка',
+                'image': SimpleUploadedFile(
+                    'photo.jpg', make_jpeg((400, 200)), 'image/jpeg'
+                ),
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Post.objects.filter(text='Большая картинка'))
+
+    def test_siblings(self):
+        """Пул миниатюр режет копию WebP"""
+        name = default_storage.save('posts/old.jpg', BytesIO(
+            make_jpeg((30, 40))
+        ))
+        make_siblings(name)
+        with default_storage.open(sibling_name(name, 'webp')) as file:
+            self.assertEqual(Image.open(file).format, 'WEBP')
+
+    def test_thumbnail_size_matches_sorl(self):
+        """Размеры миниатюры считаются так же, как их режет sorl"""
+        cases = (
+            ((400, 200), '960x339', {'crop': 'center', 'upscale': True}),
+            ((50, 100), '960x339', {'crop': 'center'}),
+            ((2000, 300), '960x339', {'crop': 'center'}),
+            ((2000, 300), '960x339', {'crop': 'center', 'upscale': False}),
+            ((400, 200), '100x100', {}),
+            ((400, 200), '100', {'upscale': True}),
+        )
+        for size, geometry, options in cases:
+            with self.subTest(size=size, geometry=geometry, **options):
+                name = default_storage.save(
+                    'posts/size.jpg', ContentFile(make_jpeg(size))
+                )
+                thumbnail = get_thumbnail(name, geometry, **options)
+                self.assertEqual(
+                    thumbnail_size(*size, geometry, **options),
+                    (thumbnail.width, thumbnail.height),
+                )
+
+    def test_img_size_from_post_fields(self):
+        """Размеры <img> берутся из полей поста, а не из миниатюры"""
+        post = self.create('photo.jpg', make_jpeg((100, 50)))
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        # Первый запрос режет миниатюру.
+        Client().get(url)
+        with mock.patch.object(
+            ImageFile, 'size', new_callable=mock.PropertyMock
+        ) as size:
+            response = Client().get(url)
+        size.assert_not_called()
+        self.assertContains(response, 'width="960" height="339"')
+        # Без записанных размеров их даёт миниатюра.
+        Post.objects.filter(pk=post.pk).update(
+            image_width=None, image_height=None
+        )
+        response = Client().get(url)
+        self.assertContains(response, 'width="960" height="339"')
@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.caching import INDEX, get_versions
+from posts.counters import get_stats
+from posts.models import Follow, Group, Post, TimelineEntry
+from posts.search import SearchResults
+
+
+User = get_user_model()
+
+
+@override_settings(POSTS_TIMELINE=True)
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.dir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_jsonl_import(self):
+        """JSONL загружается пачками, битые записи пропускаются"""
+        records = [
+            {
+                'text': f'Кот номер {i}',
+                'author': 'author',
+                'group': 'test-slug',
+            }
+            for i in range(5)
+        ]
+        records.append({
+            'text': 'Старый пост',
+            'author': 'author',
+            'pub_date': '2020-01-02T03:04:05',
+        })
+        lines = [json.dumps(record, ensure_ascii=False) for record in records]
+        lines += [
+            '{broken',
+            json.dumps({'text': 'Текст', 'author': 'nobody'}),
+            json.dumps({'text': 'Текст', 'author': 'author', 'group': 'no'}),
+            json.dumps({'text': '', 'author': 'author'}),
+        ]
+        version = get_versions(INDEX)
+        out, err = self.run_import(
+            self.write('posts.jsonl', '\n'.join(lines)), '--batch-size', '4'
+        )
+        self.assertIn('Импортировано постов: 6, пропущено: 4', out)
+        self.assertEqual(err.count('пропущена'), 4)
+        self.assertEqual(self.group.groups.count(), 5)
+        old = Post.objects.get(text='Старый пост')
+        self.assertEqual(old.pub_date.year, 2020)
+        self.assertEqual(Post.objects.first().text, 'Кот номер 4')
+        self.assertEqual(get_stats(self.author).posts_count, 6)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 6
+        )
+        self.assertEqual(SearchResults('кот').count(), 5)
+        self.assertNotEqual(get_versions(INDEX), version)
+
+    def test_csv_import(self):
+        """CSV загружается по заголовку колонок"""
+        path = self.write(
+            'posts.csv',
+            'text,author,group\n'
+            'Первый пост,author,test-slug\n'
+            '"Пост, с запятой",author,\n',
+        )
+        out, _ = self.run_import(path)
+        self.assertIn('Импортировано постов: 2, пропущено: 0', out)
+        self.assertTrue(Post.objects.filter(
+            text='Пост, с запятой', group=None
+        ).exists())
+
+    def test_unknown_format(self):
+        """Формат без расширения нужно указать"""
+        path = self.write('posts.txt', '')
+        with self.assertRaisesMessage(Exception, '--format'):
+            self.run_import(path)
+        out, _ = self.run_import(path, '--format', 'jsonl')
+        self.assertIn('Импортировано постов: 0', out)
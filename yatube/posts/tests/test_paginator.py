@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts.models import Post, Group
+from posts.paginator import (
+    CursorPaginator, decode_cursor, encode_cursor, page_window
+)
+from posts.views import COUNT_POSTS
+
+
+User = get_user_model()
+POSTS_TOTAL: int = 23
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create([
+            Post(
+                author=cls.user,
+                text=f'Тестовый текст {i}',
+                group=cls.group,
+            ) for i in range(POSTS_TOTAL)
+        ])
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Post.objects.all(), COUNT_POSTS)
+        cache.clear()
+
+    def ids(self, page):
+        return [post.pk for post in page]
+
+    def test_cursor_round_trip(self):
+        """Курсор восстанавливает исходные дату и id"""
+        post = Post.objects.first()
+        self.assertEqual(
+            decode_cursor(encode_cursor(post.pub_date, post.pk)),
+            (post.pub_date, post.pk)
+        )
+        self.assertIsNone(decode_cursor('мусор'))
+
+    def test_pages_follow_each_other(self):
+        """Курсоры обходят ленту без пропусков и повторов"""
+        page = self.paginator.first_page()
+        self.assertFalse(page.has_previous())
+        collected = self.ids(page)
+        while page.has_next():
+            page = self.paginator.page_after(page.next_cursor)
+            collected += self.ids(page)
+        self.assertEqual(collected, self.expected)
+
+    def test_page_before_returns_previous_page(self):
+        """Переход назад возвращает предыдущую страницу"""
+        first = self.paginator.first_page()
+        second = self.paginator.page_after(first.next_cursor)
+        third = self.paginator.page_after(second.next_cursor)
+        back = self.paginator.page_before(third.previous_cursor)
+        self.assertEqual(self.ids(back), self.ids(second))
+        self.assertTrue(back.has_next())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор открывает первую страницу"""
+        page = self.paginator.page_after('1.2.3')
+        self.assertEqual(self.ids(page), self.expected[:COUNT_POSTS])
+
+    def test_deep_page_costs_one_query(self):
+        """Любая страница ленты выбирается одним запросом"""
+        page = self.paginator.first_page()
+        while page.has_next():
+            cursor = page.next_cursor
+            with self.assertNumQueries(1):
+                page = self.paginator.page_after(cursor)
+
+    def test_feeds_accept_cursor_and_page(self):
+        """Ленты понимают и курсор, и старый параметр page"""
+        client = Client()
+        cursor = self.paginator.first_page().next_cursor
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = client.get(url, {'cursor': cursor})
+                self.assertEqual(
+                    self.ids(response.context['page_obj']),
+                    self.expected[COUNT_POSTS:COUNT_POSTS * 2]
+                )
+                response = client.get(url, {'page': 2})
+                self.assertEqual(
+                    self.ids(response.context['page_obj']),
+                    self.expected[COUNT_POSTS:COUNT_POSTS * 2]
+                )
+
+
+class PageWindowTest(SimpleTestCase):
+    def test_page_window(self):
+        """Края, окно вокруг текущей страницы и пропуски между ними"""
+        cases = (
+            ((1, 1), [1]),
+            ((1, 10), [1, 2, 3, None, 10]),
+            ((4, 10), [1, 2, 3, 4, 5, 6, None, 10]),
+            ((10, 10), [1, None, 8, 9, 10]),
+            ((5, 7), [1, 2, 3, 4, 5, 6, 7]),
+            ((500, 1000), [1, None, 498, 499, 500, 501, 502, None, 1000]),
+        )
+        for (number, num_pages), expected in cases:
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), expected)
+
+    def test_page_window_is_bounded(self):
+        """Длина строки не зависит от числа страниц"""
+        for num_pages in (10, 10 ** 3, 10 ** 9):
+            for number in (1, num_pages // 2, num_pages):
+                with self.subTest(number=number, num_pages=num_pages):
+                    self.assertLessEqual(
+                        len(page_window(number, num_pages)), 9
+                    )
@@ -0,0 +1,386 @@
+import re
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.template import engines
+from django.template.base import Parser
+from django.template.loader import render_to_string
+from django.template.loaders.filesystem import Loader as FileSystemLoader
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.warmup import warm_templates
+
+from posts.models import Post, Group, Follow
+from posts.paginator import CursorPaginator, decode_cursor
+from posts.tests.utils import ROW_COUNTS, create_comments, create_posts
+from posts.timeline import TimelinePaginator
+from posts.views import COUNT_COMMENTS, COUNT_POSTS
+
+
+User = get_user_model()
+PROLIFIC_POSTS: int = 10000
+# Строка плана SQLite с полным обходом таблицы: «SCAN posts_post»
+# без «USING INDEX».
+FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)\s*$', re.MULTILINE)
+INDEXED_TABLES = (
+    'posts_post', 'posts_follow', 'posts_timelineentry', 'posts_comment'
+)
+# Сессия и пользователь авторизованного клиента дают ещё два запроса.
+FEED_QUERIES = {
+    'posts:index': 3,
+    'posts:group_list': 4,
+    'posts:profile': 4,
+    'posts:post_detail': 4,
+    'posts:follow_index': 4,
+}
+
+
+# Настройки шаблонов без DEBUG, см. yatube.settings.
+PRODUCTION_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+PAGE_COUNTS = (10, 1000, 100000)
+# Строка навигации не длиннее при любом числе страниц.
+PAGINATOR_MAX_BYTES: int = 4096
+PAGINATOR_MAX_LINKS: int = 13
+
+
+class ProfileBenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.casual = User.objects.create_user(username='casual')
+        cls.prolific = User.objects.create_user(username='prolific')
+        create_posts(cls.casual, COUNT_POSTS, cls.group)
+        create_posts(cls.prolific, PROLIFIC_POSTS, cls.group)
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def measure(self, username, **params):
+        url = reverse('posts:profile', kwargs={'username': username})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url, params)
+        return response, queries.captured_queries
+
+    def test_profile_renders_one_page(self):
+        """Профиль выводит только текущую страницу постов"""
+        response, _ = self.measure('prolific')
+        self.assertEqual(len(response.context['page_obj']), COUNT_POSTS)
+        self.assertEqual(
+            response.content.decode().count('<article>'), COUNT_POSTS
+        )
+
+    def test_profile_queries_do_not_grow_with_posts(self):
+        """Число запросов профиля не зависит от числа постов автора"""
+        _, casual_queries = self.measure('casual')
+        _, prolific_queries = self.measure('prolific')
+        self.assertEqual(len(prolific_queries), len(casual_queries))
+
+    def test_profile_reads_only_page_rows(self):
+        """Профиль автора с 10 000 постов читает только строки страницы"""
+        response, _ = self.measure('prolific')
+        cursor = response.context['page_obj'].next_cursor
+        for params in ({}, {'cursor': cursor}):
+            with self.subTest(params=params):
+                cache.clear()
+                _, queries = self.measure('prolific', **params)
+                page_queries = [
+                    query['sql'] for query in queries
+                    if 'FROM "posts_post"' in query['sql']
+                    and 'ORDER BY' in query['sql']
+                ]
+                self.assertEqual(len(page_queries), 1)
+                self.assertIn(f'LIMIT {COUNT_POSTS + 1}', page_queries[0])
+                self.assertNotIn('OFFSET', page_queries[0])
+                self.assertFalse(
+                    any('COUNT(' in query['sql'] for query in queries)
+                )
+
+
+class FeedQueryCountTest(TestCase):
+    """Число запросов каждой ленты одинаково при 1, 100 и 10 000 строк."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост с комментариями', group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(self.reader)
+        self.urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': 'test-slug'}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': 'author'}
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+
+    def grow_to(self, rows):
+        create_posts(
+            self.author, rows - Post.objects.count(), self.group
+        )
+        create_comments(
+            self.post, self.reader, rows - self.post.comments.count()
+        )
+
+    def test_feed_query_counts(self):
+        for rows in ROW_COUNTS:
+            self.grow_to(rows)
+            for name, url in self.urls.items():
+                with self.subTest(rows=rows, page=name):
+                    cache.clear()
+                    with self.assertNumQueries(FEED_QUERIES[name]):
+                        self.auth_client.get(url)
+
+
+class FeedIndexTest(TestCase):
+    """Запросы лент и подписок не обходят таблицы целиком."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        create_posts(cls.author, COUNT_POSTS * 3, cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def assertUsesIndexes(self, queryset):
+        plan = queryset.explain()
+        scanned = [
+            table for table in FULL_SCAN.findall(plan)
+            if table in INDEXED_TABLES
+        ]
+        self.assertEqual(scanned, [], plan)
+
+    def test_feed_queries_use_indexes(self):
+        feeds = {
+            'index': Post.objects.feed(),
+            'group': self.group.groups.feed(),
+            'profile': self.author.posts.feed(),
+            'follow': Post.objects.feed().filter(
+                author__following__user=self.reader
+            ),
+        }
+        for name, posts in feeds.items():
+            paginator = CursorPaginator(posts, COUNT_POSTS)
+            key = decode_cursor(paginator.first_page().next_cursor)
+            for backwards in (False, True):
+                with self.subTest(feed=name, backwards=backwards):
+                    self.assertUsesIndexes(
+                        paginator.keyset(key, backwards)[:COUNT_POSTS]
+                    )
+            with self.subTest(feed=name):
+                self.assertUsesIndexes(paginator.object_list[:COUNT_POSTS])
+
+    def test_timeline_uses_index(self):
+        paginator = TimelinePaginator(self.reader, COUNT_POSTS)
+        key = decode_cursor(paginator.first_page().next_cursor)
+        for entries in (paginator.entries, paginator.pulled):
+            self.assertUsesIndexes(entries.object_list[:COUNT_POSTS])
+            self.assertUsesIndexes(entries.keyset(key)[:COUNT_POSTS])
+
+    def test_comments_use_index(self):
+        post = Post.objects.first()
+        create_comments(post, self.reader, COUNT_COMMENTS * 2)
+        paginator = CursorPaginator(
+            post.comments.all(), COUNT_COMMENTS, date_field='created'
+        )
+        key = decode_cursor(paginator.first_page().next_cursor)
+        for comments in (paginator.object_list, paginator.keyset(key)):
+            self.assertUsesIndexes(comments[:COUNT_COMMENTS])
+            # Порядок (created, id) даёт индекс, без сортировки в памяти.
+            self.assertNotIn(
+                'TEMP B-TREE', comments[:COUNT_COMMENTS].explain()
+            )
+
+    def test_follow_lookup_uses_unique_index(self):
+        self.assertUsesIndexes(
+            Follow.objects.filter(user=self.reader, author=self.author)
+        )
+
+
+class CommentPaginationTest(TestCase):
+    """Страница поста выводит ограниченное число комментариев."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Вирусный')
+        create_comments(cls.post, cls.author, COUNT_COMMENTS * 2 + 5)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_comments_are_loaded_by_pages(self):
+        """Первая страница в посте, остальные подгружаются по курсору"""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        page = response.context['comments']
+        self.assertEqual(len(page), COUNT_COMMENTS)
+        seen = [comment.pk for comment in page]
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        while page.has_next():
+            self.assertContains(response, 'js-more-comments')
+            response = self.guest_client.get(
+                url, {'cursor': page.next_cursor}
+            )
+            page = response.context['comments']
+            seen += [comment.pk for comment in page]
+        self.assertNotContains(response, 'js-more-comments')
+        self.assertEqual(
+            seen,
+            list(self.post.comments.values_list('pk', flat=True).order_by(
+                '-created', '-pk'
+            )),
+        )
+
+    def test_comments_of_missing_post_are_404(self):
+        """Комментарии несуществующего поста - ошибка 404"""
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(TEMPLATES=PRODUCTION_TEMPLATES)
+class TemplateWarmupTest(TestCase):
+    """Первый запрос страницы без прогрева шаблонов и после него."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        create_posts(cls.author, COUNT_POSTS * 2, cls.group)
+        cls.post = Post.objects.first()
+        create_comments(cls.post, cls.author, COUNT_COMMENTS)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': 'test-slug'}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': 'author'}
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}
+            ),
+            'posts:search': reverse('posts:search') + '?q=текст',
+            'about:author': reverse('about:author'),
+        }
+
+    def reset_templates(self):
+        for loader in engines['django'].engine.template_loaders:
+            loader.reset()
+
+    def count_parsing(self, url, warm):
+        """Чтения шаблонов с диска и их разборы при первом запросе."""
+        self.reset_templates()
+        if warm:
+            warm_templates()
+        cache.clear()
+        with mock.patch.object(
+            FileSystemLoader,
+            'get_contents',
+            autospec=True,
+            side_effect=FileSystemLoader.get_contents,
+        ) as get_contents, mock.patch.object(
+            Parser, 'parse', autospec=True, side_effect=Parser.parse
+        ) as parse:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return get_contents.call_count, parse.call_count
+
+    def test_warm_pages_skip_template_parsing(self):
+        """После прогрева страницы не читают и не разбирают шаблоны"""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                cold_reads, cold_parses = self.count_parsing(url, warm=False)
+                self.assertGreater(cold_reads, 0)
+                self.assertGreater(cold_parses, 0)
+                self.assertEqual(self.count_parsing(url, warm=True), (0, 0))
+
+
+class PaginatorRenderSizeTest(SimpleTestCase):
+    """Строка номеров страниц не растёт с числом страниц."""
+
+    def render(self, num_pages, number):
+        page_obj = Paginator(
+            range(num_pages * COUNT_POSTS), COUNT_POSTS
+        ).get_page(number)
+        return render_to_string('posts/includes/paginator.html', {
+            'page_obj': page_obj, 'page_params': '',
+        })
+
+    def test_render_size_is_bounded(self):
+        for num_pages in PAGE_COUNTS:
+            for number in (1, num_pages // 2, num_pages):
+                with self.subTest(num_pages=num_pages, number=number):
+                    # Полный список страниц не строится.
+                    with mock.patch.object(
+                        Paginator, 'page_range',
+                        new_callable=mock.PropertyMock,
+                    ) as page_range:
+                        html = self.render(num_pages, number)
+                    page_range.assert_not_called()
+                    self.assertLess(len(html.encode()), PAGINATOR_MAX_BYTES)
+                    self.assertLessEqual(
+                        html.count('<li'), PAGINATOR_MAX_LINKS
+                    )
+                    self.assertIn(f'>{num_pages}<', html)
@@ -0,0 +1,128 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import stem, to_terms
+from posts.tests.utils import create_posts
+from posts.views import COUNT_POSTS
+
+
+User = get_user_model()
+SEARCH_POSTS: int = 10000
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова сводятся к одной основе"""
+        forms = (
+            ('кот', 'коты', 'котов', 'котами'),
+            ('книга', 'книги', 'книгой', 'книгах'),
+            ('красивый', 'красивая', 'красивыми'),
+            ('читать', 'читаешь', 'читали'),
+        )
+        for words in forms:
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+    def test_terms(self):
+        """Текст разбивается на основы, ё и регистр не важны"""
+        self.assertEqual(to_terms('Ёлки, Django 2022!'), 'елк django 2022')
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Мои коты любят спать на книгах'
+        )
+        cls.cats_only = Post.objects.create(
+            author=cls.user, text='Котов много не бывает: коты, коты, коты'
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.user, text='Собака гуляет в парке'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query, **params):
+        return self.guest_client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+
+    def found(self, query):
+        return list(self.search(query).context['page_obj'])
+
+    def test_finds_word_forms_by_rank(self):
+        """Поиск находит формы слова, самые релевантные первыми"""
+        self.assertEqual(self.found('кот'), [self.cats_only, self.cats])
+        self.assertEqual(self.found('Книга'), [self.cats])
+        self.assertEqual(self.found('коты книги'), [self.cats])
+        self.assertEqual(self.found('кошка'), [])
+        self.assertEqual(self.found('  '), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении поста"""
+        self.dogs.text = 'Собака и кот гуляют в парке'
+        self.dogs.save()
+        self.assertIn(self.dogs, self.found('кота'))
+        self.assertEqual(self.found('собака'), [self.dogs])
+        self.dogs.delete()
+        self.assertEqual(self.found('собака'), [])
+
+    def test_query_special_characters(self):
+        """Кавычки и операторы в запросе не ломают поиск"""
+        for query in ('"кот', 'кот OR', 'NEAR(кот)', '*', 'кот-книга'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query).status_code, 200)
+
+    def test_pagination_keeps_query(self):
+        """Ссылки на страницы результатов сохраняют запрос"""
+        for i in range(12):
+            Post.objects.create(author=self.user, text=f'Кот номер {i}')
+        response = self.search('кот')
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82&amp;page=2')
+        self.assertEqual(
+            len(self.search('кот', page=2).context['page_obj']), 4
+        )
+
+    def test_rebuild_command(self):
+        """rebuild_search_index индексирует посты, созданные без сигналов"""
+        create_posts(self.user, 3)
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Постов в поисковом индексе: 6', out.getvalue())
+        self.assertEqual(len(self.found('тестовый')), 3)
+
+
+class SearchBenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        create_posts(cls.user, SEARCH_POSTS)
+        call_command('rebuild_search_index', stdout=StringIO())
+
+    def test_search_reads_only_page_rows(self):
+        """Поиск по 10 000 постов читает из таблицы постов одну страницу"""
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(reverse('posts:search'), {'q': 'текст'})
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, SEARCH_POSTS
+        )
+        posts_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "posts_post"' in query['sql']
+        ]
+        # Посты страницы достаются по id из индекса, а не перебором.
+        self.assertEqual(len(posts_queries), 1)
+        self.assertIn('"posts_post"."id" IN (', posts_queries[0])
+        self.assertEqual(len(response.context['page_obj']), COUNT_POSTS)
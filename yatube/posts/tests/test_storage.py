@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.images import sibling_name
+from posts.models import Post
+from posts.storage import walk
+from posts.thumbnails import generate
+
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+OTHER_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\xFF\x00\x00')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POSTS_THUMBNAIL_WORKERS=0,
+    POSTS_IMAGE_SIBLINGS=('webp',),
+)
+class HashedStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create(self, content, name='small.gif'):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(name, content, 'image/gif'),
+        )
+
+    def files(self):
+        return sorted(walk(default_storage, 'posts/'))
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_media', *args, stdout=out)
+        return out.getvalue()
+
+    def test_same_content_shares_file(self):
+        """Одинаковые загрузки ссылаются на один файл"""
+        first = self.create(SMALL_GIF)
+        second = self.create(SMALL_GIF, name='copy.gif')
+        other = self.create(OTHER_GIF)
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertEqual(
+            self.files(), sorted([first.image.name, other.image.name])
+        )
+        digest = os.path.basename(first.image.name)
+        self.assertEqual(len(digest), len('0' * 64 + '.gif'))
+
+    def test_gc_removes_unreferenced_files(self):
+        """gc_media удаляет файл, когда на него не ссылается ни один пост"""
+        kept = self.create(SMALL_GIF)
+        shared = self.create(OTHER_GIF)
+        self.create(OTHER_GIF).delete()
+        generate(shared.image.name)
+        sibling = sibling_name(shared.image.name, 'webp')
+        self.assertTrue(default_storage.exists(sibling))
+        self.assertIn('удалено: 0', self.gc('--grace-hours', '0'))
+        shared.delete()
+        self.assertIn('удалено: 0', self.gc())
+        self.assertIn('можно удалить: 1', self.gc(
+            '--grace-hours', '0', '--dry-run'
+        ))
+        self.assertIn('удалено: 1', self.gc('--grace-hours', '0'))
+        self.assertEqual(self.files(), [kept.image.name])
+        self.assertFalse(default_storage.exists(sibling))
+
+    def test_reused_file_is_not_collected(self):
+        """Повторная загрузка старого файла защищает его от gc_media"""
+        post = self.create(SMALL_GIF)
+        storage = post.image.storage
+        name = post.image.name
+        path = storage.path(name)
+        with storage.open(name) as file:
+            content = ContentFile(file.read())
+        old = time.time() - 7 * 24 * 3600
+        os.utime(path, (old, old))
+        post.delete()
+        # Картинка новой формы уже записана, пост ещё не сохранён.
+        saved = storage.save('posts/small.gif', content)
+        self.assertEqual(saved, name)
+        self.assertGreater(os.path.getmtime(path), old)
+        self.assertIn('удалено: 0', self.gc())
+        self.assertTrue(storage.exists(name))
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.throttle import take_token
+
+
+User = get_user_model()
+
+
+@override_settings(POSTS_THROTTLE_RATES={
+    'add_comment': (3, 60), 'post_create': (2, 60),
+})
+class ThrottleTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(author=cls.user, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_bucket_refills(self):
+        """Жетоны возвращаются со временем, но не больше ёмкости"""
+        for _ in range(3):
+            self.assertEqual(take_token('add_comment', 1, now=100), 0)
+        self.assertAlmostEqual(take_token('add_comment', 1, now=100), 20)
+        self.assertEqual(take_token('add_comment', 1, now=120), 0)
+        self.assertGreater(take_token('add_comment', 1, now=120), 0)
+        for _ in range(3):
+            self.assertEqual(take_token('add_comment', 1, now=1000), 0)
+
+    def test_comment_burst_is_throttled(self):
+        """Лишний комментарий - ответ 429 с Retry-After и без записи"""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        for _ in range(3):
+            self.assertEqual(
+                self.client.post(url, {'text': 'Текст'}).status_code, 302
+            )
+        response = self.client.post(url, {'text': 'Текст'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_limits_are_per_user_and_action(self):
+        """Лимит свой у каждого пользователя и действия, GET не считается"""
+        url = reverse('posts:post_create')
+        for _ in range(3):
+            self.client.get(url)
+            self.client.post(url, {'text': 'Новый пост'})
+        self.assertEqual(Post.objects.filter(text='Новый пост').count(), 2)
+        other = Client()
+        other.force_login(self.other)
+        self.assertEqual(
+            other.post(url, {'text': 'Новый пост'}).status_code, 302
+        )
+        comment_url = reverse(
+            'posts:add_comment', kwargs={'post_id': self.post.pk}
+        )
+        self.assertEqual(
+            self.client.post(comment_url, {'text': 'Текст'}).status_code, 302
+        )
+
+    @override_settings(POSTS_THROTTLE_RATES={'post_create': None})
+    def test_limit_can_be_disabled(self):
+        """Лимит None отключает ограничение"""
+        for _ in range(20):
+            self.assertEqual(take_token('post_create', self.user.pk), 0)
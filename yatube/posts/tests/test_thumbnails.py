@@ -0,0 +1,149 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    KVStore as CachedDBKVStore
+)
+
+from posts.models import Post
+from posts.templatetags.post_cards import post_cards
+from posts.thumbnails import generate, get_sizes, get_thumbnail_file
+
+
+User = get_user_model()
+IMAGE_POSTS: int = 3
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        cache.clear()
+
+    def assertRendersWithoutResizing(self):
+        with mock.patch.object(
+            ThumbnailBackend, '_create_thumbnail'
+        ) as create:
+            response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, '<img class="card-img')
+        create.assert_not_called()
+
+    def test_generate_prepares_page_thumbnails(self):
+        """После generate лента не режет картинки в запросе"""
+        self.assertEqual(generate(self.post.image.name), self.post.image.name)
+        self.assertRendersWithoutResizing()
+
+    def test_generate_reports_broken_image(self):
+        """Битая картинка не роняет нарезку"""
+        self.assertIsNone(generate('posts/missing.gif'))
+
+    def test_backfill_command(self):
+        """generate_thumbnails нарезает картинки существующих постов"""
+        out = StringIO()
+        call_command('generate_thumbnails', '--workers', '0', stdout=out)
+        self.assertIn('Готово картинок: 1, с ошибками: 0', out.getvalue())
+        self.assertRendersWithoutResizing()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
+class ThumbnailKVStoreTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        # Файл прошлого теста с тем же содержимым остаётся на диске, а его
+        # записи в хранилище миниатюр - в общем кеше.
+        cache.clear()
+        for i in range(IMAGE_POSTS):
+            post = Post.objects.create(
+                author=self.user,
+                text=f'Пост с картинкой {i}',
+                image=SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, 'image/gif'
+                ),
+            )
+            generate(post.image.name)
+        cache.clear()
+
+    def kvstore_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, '<img class="card-img', IMAGE_POSTS)
+        return [
+            query for query in queries.captured_queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+
+    def test_page_thumbnails_in_one_query(self):
+        """Миниатюры всей страницы читаются одним запросом"""
+        self.assertEqual(len(self.kvstore_queries()), 1)
+
+    def test_cards_do_not_read_thumbnails_one_by_one(self):
+        """Карточки берут миниатюры из пакета, а не из кеша по одной"""
+        posts = list(Post.objects.feed())
+        with mock.patch.object(
+            CachedDBKVStore, '_get_raw', autospec=True,
+            side_effect=CachedDBKVStore._get_raw,
+        ) as get_raw, mock.patch.object(
+            caches['default'], 'get', wraps=caches['default'].get
+        ) as get:
+            cards = post_cards(posts)
+        self.assertEqual(len(cards), IMAGE_POSTS)
+        self.assertTrue(all('<img class="card-img' in card for card in cards))
+        get_raw.assert_not_called()
+        get.assert_not_called()
+
+    def test_thumbnail_file_matches_sorl(self):
+        """get_thumbnail_file называет файл так же, как sorl"""
+        post = Post.objects.first()
+        for geometry, options in get_sizes():
+            with self.subTest(geometry=geometry):
+                self.assertEqual(
+                    get_thumbnail_file(post.image, geometry, options).name,
+                    get_thumbnail(post.image, geometry, **options).name,
+                )
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry
+from posts.timeline import TimelinePaginator, rebuild
+
+
+User = get_user_model()
+PER_PAGE: int = 3
+
+
+@override_settings(POSTS_TIMELINE=True)
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.fan = User.objects.create_user(username='fan')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def entries(self):
+        return set(
+            TimelineEntry.objects.filter(user=self.reader).values_list(
+                'post_id', flat=True
+            )
+        )
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка добавляет старые посты в ленту, отписка убирает"""
+        old = Post.objects.create(author=self.author, text='Старый пост')
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(self.entries(), {old.pk})
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(self.entries(), set())
+
+    def test_new_post_fans_out(self):
+        """Новый пост сразу попадает в ленту подписчика"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.entries(), {post.pk})
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+    @override_settings(POSTS_TIMELINE_CELEBRITY_FOLLOWERS=2)
+    def test_celebrity_posts_are_pulled(self):
+        """Посты популярного автора подтягиваются при чтении ленты"""
+        Follow.objects.create(user=self.fan, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(author=author, text=f'Пост {i}')
+            for i, author in enumerate([self.star, self.author] * 4)
+        ]
+        self.assertEqual(
+            self.entries(),
+            {post.pk for post in posts if post.author == self.author}
+        )
+        paginator = TimelinePaginator(self.reader, PER_PAGE)
+        page = paginator.first_page()
+        collected = list(page)
+        while page.has_next():
+            page = paginator.page_after(page.next_cursor)
+            collected += list(page)
+        self.assertEqual(collected, posts[::-1])
+
+    @override_settings(POSTS_TIMELINE_CELEBRITY_FOLLOWERS=2)
+    def test_demoted_celebrity_posts_stay_in_feed(self):
+        """Посты автора, ставшего непопулярным, остаются в ленте"""
+        fan_follow = Follow.objects.create(user=self.fan, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.star)
+        posts = [
+            Post.objects.create(author=self.star, text=f'Пост {i}')
+            for i in range(2)
+        ]
+        self.assertEqual(self.entries(), set())
+        fan_follow.delete()
+        self.assertEqual(self.entries(), {post.pk for post in posts})
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), posts[::-1])
+        post = Post.objects.create(author=self.star, text='Новый пост')
+        self.assertIn(post.pk, self.entries())
+
+    def test_rebuild(self):
+        """rebuild восстанавливает ленты по подпискам"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.bulk_create(
+            Post(author=self.author, text='Импорт') for _ in range(2)
+        )
+        self.assertEqual(self.entries(), set())
+        rebuild()
+        self.assertEqual(
+            self.entries(),
+            set(Post.objects.values_list('pk', flat=True))
+        )
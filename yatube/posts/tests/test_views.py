@@ -93,14 +93,25 @@ class PostPagesTest(TestCase):
     def test_index_page_cache(self):
         """Шаблон index с кешированием"""
         response = self.auth_client.get(reverse('posts:index'))
-        self.post.text = 'Изменили текст'
-        self.post.save()
+        Post.objects.filter(pk=self.post.pk).update(text='Изменили текст')
         response_cache = self.auth_client.get(reverse('posts:index'))
         self.assertEqual(response.content, response_cache.content)
         cache.clear()
         response_clear = self.auth_client.get(reverse('posts:index'))
         self.assertNotEqual(response_cache.content, response_clear.content)
 
+    def test_index_cache_invalidation(self):
+        """Новый и изменённый пост сразу видны на закешированном index"""
+        response = self.auth_client.get(reverse('posts:index'))
+        self.post.text = 'Изменили текст'
+        self.post.save()
+        response_edit = self.auth_client.get(reverse('posts:index'))
+        self.assertNotEqual(response.content, response_edit.content)
+        self.assertContains(response_edit, 'Изменили текст')
+        Post.objects.create(author=self.author, text='Новый пост')
+        response_new = self.auth_client.get(reverse('posts:index'))
+        self.assertContains(response_new, 'Новый пост')
+
     def test_group_list_context(self):
         """Шаблон group_list с правильным контекстом"""
         response = self.auth_client.get(reverse(
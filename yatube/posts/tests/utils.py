@@ -0,0 +1,20 @@
+"""Общие помощники тестов posts."""
+from posts.models import Comment, Post
+
+
+# Размеры таблиц, на которых запросы страницы не должны меняться.
+ROW_COUNTS = (1, 100, 10000)
+
+
+def create_posts(author, count, group=None):
+    Post.objects.bulk_create(
+        Post(author=author, text=f'Тестовый текст {i}', group=group)
+        for i in range(count)
+    )
+
+
+def create_comments(post, author, count):
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=f'Комментарий {i}')
+        for i in range(count)
+    )
@@ -0,0 +1,65 @@
+"""Ограничение частоты записей пользователя: корзина жетонов в кеше.
+
+У каждого пользователя и действия своя корзина на ``capacity`` жетонов,
+которая наполняется равномерно за ``period`` секунд. Запрос тратит
+жетон; если корзина пуста, ответ 429 с заголовком Retry-After. Чтение и
+запись корзины не атомарны, поэтому при одновременных запросах из
+разных процессов лимит соблюдается приблизительно.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+THROTTLE_PREFIX: str = 'posts:throttle:'
+
+# Действие: (жетонов в корзине, секунд на полное наполнение).
+RATES = {
+    'add_comment': (20, 60),
+    'post_create': (10, 60),
+}
+
+
+def get_rate(scope):
+    """Лимит действия; ``None`` в POSTS_THROTTLE_RATES отключает его."""
+    rates = getattr(settings, 'POSTS_THROTTLE_RATES', {})
+    return rates[scope] if scope in rates else RATES.get(scope)
+
+
+def take_token(scope, user_id, now=None):
+    """Тратит жетон; возвращает 0 или сколько секунд ждать следующего."""
+    rate = get_rate(scope)
+    if rate is None:
+        return 0
+    capacity, period = rate
+    now = time.time() if now is None else now
+    key = f'{THROTTLE_PREFIX}{scope}:{user_id}'
+    tokens, stamp = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - stamp) * capacity / period)
+    if tokens < 1:
+        return (1 - tokens) * period / capacity
+    cache.set(key, (tokens - 1, now), timeout=period)
+    return 0
+
+
+def throttle(scope):
+    """Ограничивает POST-запросы авторизованного пользователя."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST' and request.user.is_authenticated:
+                wait = take_token(scope, request.user.pk)
+                if wait:
+                    response = HttpResponse(
+                        'Слишком много запросов, попробуйте позже.',
+                        status=429,
+                    )
+                    response['Retry-After'] = str(math.ceil(wait))
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,136 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+import sorl
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults, settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import images
+
+
+logger = logging.getLogger(__name__)
+
+# Размеры, которые выводят шаблоны через {% thumbnail %}; геометрия и
+# параметры должны совпадать с шаблонами, иначе имя миниатюры другое.
+THUMBNAIL_SIZES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+WORKERS: int = 2
+# Версии sorl, на которых проверен get_thumbnail_file.
+SORL_VERSIONS = ('12.6.3',)
+
+_executor = None
+
+
+def get_sizes():
+    return getattr(settings, 'POSTS_THUMBNAIL_SIZES', THUMBNAIL_SIZES)
+
+
+def get_workers():
+    return getattr(settings, 'POSTS_THUMBNAIL_WORKERS', WORKERS)
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def make_pool(workers):
+    """Пул процессов для нарезки; spawn не тянет в потомков соединения БД."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+    )
+
+
+def generate(name):
+    """Создаёт миниатюры и копии картинки, возвращает её имя."""
+    storage = images.get_storage()
+    if not storage.exists(name):
+        logger.warning('Картинка %s не найдена', name)
+        return None
+    # Ключи sorl зависят от хранилища, поэтому оно то же, что у поля.
+    source = ImageFile(name, storage)
+    try:
+        for geometry, options in get_sizes():
+            get_thumbnail(source, geometry, **options)
+        images.make_siblings(name)
+    except Exception:
+        logger.exception('Не удалось нарезать миниатюры для %s', name)
+        return None
+    return name
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = make_pool(get_workers())
+    return _executor
+
+
+def schedule(image):
+    """Ставит нарезку миниатюр после фиксации транзакции с постом.
+
+    При ``POSTS_THUMBNAIL_WORKERS = 0`` миниатюры режутся сразу
+    в текущем процессе.
+    """
+    if not image:
+        return
+    name = image.name
+    if get_workers():
+        transaction.on_commit(lambda: _get_executor().submit(generate, name))
+    else:
+        transaction.on_commit(lambda: generate(name))
+
+
+def get_thumbnail_file(image, geometry, options):
+    """Файл миниатюры, который вернёт get_thumbnail с теми же параметрами.
+
+    Имя миниатюры sorl считает закрытыми методами бэкенда, поэтому расчёт
+    собран здесь и включается только на проверенных версиях sorl
+    (``SORL_VERSIONS``, та же версия закреплена в requirements.txt). На
+    других версиях возвращает None, и миниатюры читаются по одной.
+    """
+    if getattr(sorl, '__version__', None) not in SORL_VERSIONS:
+        return None
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+@contextmanager
+def prefetched(posts):
+    """На время блока миниатюры постов читаются одним пакетом.
+
+    Без пакетного хранилища или на непроверенной версии sorl блок
+    выполняется как есть.
+    """
+    kvstore = default.kvstore
+    files = []
+    if hasattr(kvstore, 'prefetched'):
+        files = [
+            get_thumbnail_file(post.image, geometry, options)
+            for post in posts if post.image
+            for geometry, options in get_sizes()
+        ]
+    if not files or None in files:
+        yield
+        return
+    with kvstore.prefetched(files):
+        yield
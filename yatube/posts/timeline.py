@@ -0,0 +1,195 @@
+from django.conf import settings
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .paginator import CursorPaginator
+
+
+# Авторы с таким числом подписчиков не раскладываются по лентам,
+# их посты подтягиваются при чтении.
+CELEBRITY_FOLLOWERS: int = 1000
+BATCH_SIZE: int = 500
+
+
+def is_enabled():
+    return getattr(settings, 'POSTS_TIMELINE', False)
+
+
+def celebrity_followers():
+    return getattr(
+        settings, 'POSTS_TIMELINE_CELEBRITY_FOLLOWERS', CELEBRITY_FOLLOWERS
+    )
+
+
+def is_celebrity(author_id):
+    return AuthorStats.objects.filter(
+        user_id=author_id, followers_count__gte=celebrity_followers()
+    ).exists()
+
+
+def fan_out(post):
+    """Кладёт новый пост в ленты подписчиков автора."""
+    if not is_enabled() or is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        'user_id', flat=True
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in followers.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_many(posts):
+    """Раскладывает пачку новых постов по лентам за пару запросов."""
+    if not is_enabled():
+        return
+    author_ids = {post.author_id for post in posts}
+    celebrities = set(AuthorStats.objects.filter(
+        user_id__in=author_ids, followers_count__gte=celebrity_followers()
+    ).values_list('user_id', flat=True))
+    followers = {}
+    follows = Follow.objects.filter(
+        author_id__in=author_ids - celebrities
+    ).values_list('author_id', 'user_id')
+    for author_id, user_id in follows.iterator():
+        followers.setdefault(author_id, []).append(user_id)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for post in posts
+            for user_id in followers.get(post.author_id, ())
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _backfill(user_ids, author_id):
+    posts = list(Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    ).order_by())
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for user_id in user_ids
+            for post_id, pub_date in posts
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика уже написанные посты автора."""
+    if not is_enabled() or is_celebrity(author_id):
+        return
+    _backfill([user_id], author_id)
+
+
+def follower_lost(author_id):
+    """Раскладывает посты автора, который перестал быть популярным.
+
+    Посты популярного автора не раскладываются, а подтягиваются при
+    чтении, пока подписчиков не меньше порога. Когда последняя отписка
+    опускает автора ниже порога, все его посты кладутся в ленты
+    оставшихся подписчиков. Когда автор становится популярным, ничего
+    делать не нужно: разложенные раньше записи сливаются с подтянутыми.
+    """
+    if not is_enabled():
+        return
+    followers_count = AuthorStats.objects.filter(
+        user_id=author_id
+    ).values_list('followers_count', flat=True).first()
+    if followers_count != celebrity_followers() - 1:
+        return
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True
+    )
+    _backfill(followers.iterator(), author_id)
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(user_ids=None):
+    """Собирает ленты заново по текущим подпискам."""
+    follows = Follow.objects.order_by('pk')
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+        entries = entries.filter(user_id__in=user_ids)
+    entries.delete()
+    for user_id, author_id in follows.values_list('user_id', 'author_id'):
+        backfill(user_id, author_id)
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок из разложенных записей и постов популярных авторов.
+
+    Посты обычных авторов читаются одним срезом индекса
+    ``(user, pub_date, post)``, посты популярных авторов подтягиваются
+    отдельным запросом, и обе выборки сливаются по ключу (дата, id).
+    Старые ссылки ``?page=N`` обслуживает обычный запрос через Follow.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(
+            Post.objects.feed().filter(author__following__user=user),
+            per_page,
+        )
+        self.entries = CursorPaginator(
+            TimelineEntry.objects.filter(user=user).select_related(
+                'post__author', 'post__group'
+            ),
+            per_page,
+            pk_field='post_id',
+        )
+        self.pulled = CursorPaginator(
+            Post.objects.feed().filter(
+                author__following__user=user,
+                author__stats__followers_count__gte=celebrity_followers(),
+            ),
+            per_page,
+        )
+
+    def fetch(self, key=None, reverse=False):
+        posts = {
+            entry.post.pk: entry.post
+            for entry in self.entries.fetch(key, reverse)
+        }
+        for post in self.pulled.fetch(key, reverse):
+            posts.setdefault(post.pk, post)
+        return sorted(
+            posts.values(),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=not reverse,
+        )[:self.per_page + 1]
+
+
+def follow_paginator(user, per_page):
+    if is_enabled():
+        return TimelinePaginator(user, per_page)
+    return CursorPaginator(
+        Post.objects.feed().filter(author__following__user=user), per_page
+    )
@@ -11,7 +11,13 @@ urlpatterns = [
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('tech/', views.tech, name='tech'),
+    path('search/', views.search, name='search'),
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
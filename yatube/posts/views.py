@@ -1,23 +1,43 @@
-from django.core.paginator import Paginator
+import hashlib
+
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Group, User, Follow
+from .models import Comment, Post, User, Follow
 from .forms import PostForm, CommentForm
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
 from django.urls import reverse
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, quote_etag
+)
+from django.utils.http import urlencode
+from .caching import (
+    GROUPS, INDEX, author_key, cache_anonymous, cache_versioned, group_key
+)
+from .counters import get_stats
+from .groups import get_group_or_404
+from .paginator import AFTER_PARAM, CursorPaginator
+from .search import SearchResults
+from .timeline import follow_paginator
+from .throttle import throttle
+from . import buffer, thumbnails
 
 
 COUNT_POSTS: int = 10
+COUNT_COMMENTS: int = 20
 SIMBOLS: int = 30
 
 
-@cache_page(20)
+def get_page_obj(request, posts):
+    paginator = CursorPaginator(posts, COUNT_POSTS)
+    return paginator.get_page_from_query(request.GET)
+
+
+@cache_versioned(lambda: (INDEX, GROUPS))
 def index(request):
     template = 'posts/index.html'
-    posts = Post.objects.select_related()
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = Post.objects.feed()
+    page_obj = get_page_obj(request, posts)
     context = {
         'posts': posts,
         'page_obj': page_obj,
@@ -25,13 +45,28 @@ def index(request):
     return render(request, template, context)
 
 
+def get_comments_page(post_id, cursor=None):
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COUNT_COMMENTS,
+        date_field='created',
+    )
+    return paginator.page_after(cursor)
+
+
+def get_last_edit(posts):
+    return posts.aggregate(last_edit=Max('updated'))['last_edit']
+
+
+@cache_anonymous(
+    lambda slug: (group_key(slug), GROUPS),
+    lambda slug: get_last_edit(Post.objects.filter(group__slug=slug)),
+)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.groups.select_related('group')
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = get_group_or_404(slug)
+    posts = group.groups.feed()
+    page_obj = get_page_obj(request, posts)
     context = {
         'group': group,
         'posts': posts,
@@ -40,30 +75,67 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@cache_anonymous(
+    lambda username: (author_key(username), GROUPS),
+    lambda username: get_last_edit(
+        Post.objects.filter(author__username=username)
+    ),
+)
 def profile(request, username):
     template = 'posts/profile.html'
-    user = get_object_or_404(User, username=username)
-    posts = user.posts.select_related('author')
-    counter_posts = posts.count()
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    user = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    posts = user.posts.feed()
+    stats = get_stats(user)
+    page_obj = get_page_obj(request, posts)
     context = {
-        'posts': posts,
         'page_obj': page_obj,
         'author': user,
-        'counter_posts': counter_posts,
+        'stats': stats,
+        'counter_posts': stats.posts_count,
     }
     return render(request, template, context)
 
 
+def get_post_etag(request, post):
+    """ETag страницы поста: всё, что на ней выводится, кроме комментариев.
+
+    Last-Modified не отдаётся: время правки хранится точнее секунды, и
+    две правки за одну секунду дали бы одинаковый заголовок.
+    """
+    author = post.author
+    # Авторизованному выводится своя шапка и форма комментария с токеном
+    # CSRF; после нового входа токен другой, и старая форма не годится.
+    csrf_token = ''
+    if request.user.is_authenticated:
+        csrf_token = request.META.get('CSRF_COOKIE', '')
+    stamp = '\0'.join(str(value) for value in (
+        request.user.pk or 0,
+        csrf_token,
+        post.updated.timestamp(),
+        post.comments_count,
+        get_stats(author).posts_count,
+        author.username,
+        author.get_full_name(),
+    ))
+    return quote_etag(hashlib.md5(stamp.encode()).hexdigest())
+
+
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    counter_posts = post.author.posts.count()
+    post = get_object_or_404(
+        Post.objects.feed().select_related('author__stats'), pk=post_id
+    )
+    etag = get_post_etag(request, post)
+    if request.method in ('GET', 'HEAD'):
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+    counter_posts = get_stats(post.author).posts_count
     title = post.text[:SIMBOLS]
     form = CommentForm(request.POST or None)
-    comments = post.comments.select_related('post', )
+    comments = get_comments_page(post.pk)
     context = {
         'post': post,
         'title': title,
@@ -71,6 +143,32 @@ def post_detail(request, post_id):
         'comments': comments,
         'form': form,
     }
+    response = render(request, template, context)
+    response['ETag'] = etag
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    return response
+
+
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(SearchResults(query), COUNT_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_params': urlencode({'q': query}) + '&',
+    }
+    return render(request, template, context)
+
+
+def post_comments(request, post_id):
+    template = 'posts/includes/comments.html'
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post_id': post_id,
+        'comments': get_comments_page(post_id, request.GET.get(AFTER_PARAM)),
+    }
     return render(request, template, context)
 
 
@@ -80,6 +178,7 @@ def tech(request):
 
 
 @login_required
+@throttle('post_create')
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm()
@@ -92,6 +191,7 @@ def post_create(request):
             post = post.save(commit=False)
             post.author = request.user
             post.save()
+            thumbnails.schedule(post.image)
             return redirect('posts:profile', post.author)
         return render(request, template, context)
     return render(request, template, context)
@@ -104,6 +204,7 @@ def post_edit(request, post_id):
     if request.method == 'POST':
         form = PostForm(
             request.POST,
+            files=request.FILES or None,
             instance=post
         )
         context = {
@@ -117,6 +218,8 @@ def post_edit(request, post_id):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            if 'image' in form.changed_data:
+                thumbnails.schedule(post.image)
             return redirect('posts:post_detail', post_id)
         return render(request, template, context)
     form = PostForm(instance=post, files=request.FILES or None,)
@@ -129,9 +232,17 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle('add_comment')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
+    if buffer.is_enabled():
+        # Пост проверит запись очереди, см. posts.buffer.
+        if form.is_valid():
+            buffer.get_comment_buffer().add(
+                post_id, request.user.pk, form.cleaned_data['text']
+            )
+        return redirect('posts:post_detail', post_id=post_id)
+    post = get_object_or_404(Post, pk=post_id)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
@@ -143,12 +254,9 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = follow_paginator(request.user, COUNT_POSTS)
+    page_obj = paginator.get_page_from_query(request.GET)
     context = {
-        'posts': posts,
         'page_obj': page_obj,
     }
     return render(request, template, context)
@@ -157,17 +265,14 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     user = request.user
-    author = User.objects.get(username=username)
-    is_follower = Follow.objects.filter(user=user, author=author)
-    if user != author and not is_follower.exists():
-        Follow.objects.create(user=user, author=author)
+    author = get_object_or_404(User, username=username)
+    if user != author:
+        Follow.objects.get_or_create(user=user, author=author)
     return redirect(reverse('posts:profile', args=[username]))
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    is_follower = Follow.objects.filter(user=request.user, author=author)
-    if is_follower.exists():
-        is_follower.delete()
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=author)
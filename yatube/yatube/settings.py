@@ -78,6 +78,18 @@ TEMPLATES = [
     },
 ]
 
+# Без отладки шаблоны разбираются один раз на процесс, а yatube.wsgi
+# разбирает их все заранее (core.warmup). При DEBUG загрузчики Django
+# по умолчанию, чтобы правки шаблонов были видны без перезапуска.
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -130,6 +142,10 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# Сюда collectstatic собирает статику с хешем в имени и сжатыми копиями,
+# отсюда её раздаёт core.static.StaticFilesApp из yatube.wsgi.
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStorage'
 
 # New moduls for Yatube project
 
@@ -145,8 +161,46 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Общий для всех процессов кеш в файле SQLite; очищается после migrate.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
     }
 }
+
+# Тесты получают свой кеш во временном каталоге, см. core.testing;
+# для pytest то же делает tests/conftest.py.
+TEST_RUNNER = 'core.testing.TestRunner'
+
+# Лента подписок раскладывается по подписчикам при публикации поста,
+# после включения на существующей базе выполните rebuild_timeline.
+POSTS_TIMELINE = True
+POSTS_TIMELINE_CELEBRITY_FOLLOWERS = 1000
+
+# Миниатюры картинок постов режутся в пуле процессов сразу после
+# сохранения поста; 0 - резать в процессе запроса.
+POSTS_THUMBNAIL_WORKERS = 2
+
+# Лимиты записей пользователя: действие -> (запросов, за секунд),
+# None снимает лимит; по умолчанию см. posts.throttle.RATES.
+POSTS_THROTTLE_RATES = {}
+
+# Комментарии пишутся пачками из очереди процесса, см. posts.buffer.
+POSTS_COMMENT_BUFFER = False
+
+# Картинки постов уменьшаются до этой стороны и пересохраняются без
+# EXIF; копии в форматах из POSTS_IMAGE_SIBLINGS режет пул миниатюр.
+POSTS_IMAGE_MAX_SIDE = 1920
+POSTS_IMAGE_SIBLINGS = ('webp',)
+
+# Загрузки больше этого размера пишутся на диск частями, а не в память.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+
+# Метаданные миниатюр: общая таблица sorl в базе, кеш перед ней
+# и пакетное чтение для целой страницы постов.
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from core.static import StaticFilesApp  # noqa: E402
+
+# Статика и медиа отдаются до Django, см. core.static.
+application = StaticFilesApp(application)
+
+from core.warmup import warm_templates  # noqa: E402
+
+warm_templates()